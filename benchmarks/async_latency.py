@@ -0,0 +1,92 @@
+"""Sequential vs. async request path against stubbed backends, at equal concurrency.
+
+Both runs serve requests from the same pool of `--concurrency` threads, like
+gunicorn's gthread workers. The sync run calls `pipeline.answer` with every stage
+in series. The async run does what Flask does for the async /get view: each
+request runs `pipeline.answer_async` on its own event loop inside its thread. The
+async view does not raise the number of requests a worker serves at once. It
+only shortens each request by overlapping vector search with the web search.
+
+    python -m benchmarks.async_latency --requests 200 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.report import percentiles, write_results
+from benchmarks.stubs import StubEmbeddings, StubLLM, StubVectorStore, StubWebSearch
+from src import pipeline
+from src.retrieval import DenseRetriever
+
+
+def components(args):
+    return {
+        "embeddings": StubEmbeddings(latency=args.embed_ms / 1000),
+        # pdf_hits=0 forces the web fallback, which is where overlapping the stages pays off
+        "retriever": DenseRetriever(StubVectorStore(latency=args.search_ms / 1000, hits=args.pdf_hits)),
+        "llm": StubLLM(latency=args.llm_ms / 1000),
+        "web_search": StubWebSearch(latency=args.web_ms / 1000),
+    }
+
+
+def queries(n):
+    return [f"what is the latest treatment for condition {i}" for i in range(n)]
+
+
+def run(args, concurrency, one):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, queries(args.requests)))
+    return latencies, time.perf_counter() - start
+
+
+def run_sync(args, concurrency):
+    parts = components(args)
+
+    def one(query):
+        start = time.perf_counter()
+        pipeline.answer(query, [], **parts)
+        return time.perf_counter() - start
+
+    return run(args, concurrency, one)
+
+
+def run_async(args, concurrency):
+    parts = components(args)
+
+    def one(query):
+        # A fresh event loop per request in the request's thread, as Flask runs async views
+        start = time.perf_counter()
+        asyncio.run(pipeline.answer_async(query, [], **parts))
+        return time.perf_counter() - start
+
+    return run(args, concurrency, one)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Request threads; both paths run once per level.")
+    parser.add_argument("--embed-ms", type=float, default=5)
+    parser.add_argument("--search-ms", type=float, default=40)
+    parser.add_argument("--web-ms", type=float, default=300)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    parser.add_argument("--pdf-hits", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for concurrency in args.concurrency:
+        runs = {}
+        for name, runner in (("sync", run_sync), ("async", run_async)):
+            latencies, elapsed = runner(args, concurrency)
+            runs[name] = {**percentiles(latencies), "rps": round(len(latencies) / elapsed, 2)}
+        results[str(concurrency)] = runs
+
+    write_results(args.output, args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Replay a query corpus against app.py's /get and report throughput, latency and memory.
+
+By default app.py is imported in-process with its pipeline built from the
+deterministic stand-ins in benchmarks.stubs (hash embeddings, an in-memory
+LocalVectorStore, a fake ChatGroq and the stub CSE server), then served by a
+threaded werkzeug server. Pass --url to load-test an already running server instead.
+
+    python -m benchmarks.load_test --concurrency 16 --requests 400 \\
+        --output benchmarks/results/load_test.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from benchmarks.report import memory_mb, percentiles, write_results
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_QUERIES = os.path.join(DATA_DIR, "rerank_eval.jsonl")
+
+
+def load_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+# === In-process Server with Stubbed Backends ===
+def start_stub_app(args):
+    # src.config reads the environment at import, so this has to happen before app is imported
+    cse = None
+    if args.web_ms >= 0:
+        from benchmarks.stubs import serve_stub_cse
+
+        cse = serve_stub_cse(port=args.cse_port, latency=args.web_ms / 1000)
+        os.environ["CAREASSIST_WEB_SEARCH_BACKEND"] = "http"
+        os.environ["CAREASSIST_WEB_SEARCH_URL"] = f"http://127.0.0.1:{args.cse_port}/customsearch/v1"
+    else:
+        os.environ["CAREASSIST_WEB_SEARCH_BACKEND"] = "none"
+    os.environ.setdefault("CAREASSIST_SESSION_BACKEND", "memory")
+    os.environ.setdefault("CAREASSIST_HYBRID_SEARCH", "0")
+    os.environ.setdefault("CAREASSIST_REQUEST_LOGS", "0")
+    if not args.warm_caches:
+        # Every replayed query should pay for the full pipeline
+        os.environ["CAREASSIST_ANSWER_CACHE"] = "0"
+        os.environ["CAREASSIST_WEB_SEARCH_CACHE_SIZE"] = "0"
+
+    from benchmarks.stubs import StubEmbeddings, StubLLM, in_memory_vector_store
+    from src.engine import get_pipeline
+    from src.helper import query_embeddings
+
+    # app.py picks up this process-wide pipeline instead of building the real one
+    embeddings = query_embeddings(
+        StubEmbeddings(latency=args.embed_ms / 1000), cache_size=0, batch_size=args.embedding_batch_size
+    )
+    get_pipeline(
+        embeddings=embeddings,
+        docsearch=in_memory_vector_store(embeddings, n=args.passages),
+        llm=StubLLM(latency=args.llm_ms / 1000, tokens=args.llm_tokens, tokens_per_sec=args.tokens_per_sec),
+        **({} if args.faq else {"faq": None})
+    )
+
+    import app
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", args.port, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cse
+
+
+# === Client ===
+def replay(url, queries, requests, concurrency, timeout):
+    import urllib3
+
+    http = urllib3.PoolManager(maxsize=concurrency, timeout=urllib3.Timeout(total=timeout))
+    lock = threading.Lock()
+    errors = []
+
+    def one(i):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        try:
+            response = http.request(
+                "POST", url + "/get",
+                body=urlencode({"msg": query}),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                retries=False
+            )
+            ok = response.status == 200
+        except Exception as e:
+            ok = False
+            response = e
+        elapsed = time.perf_counter() - start
+        if not ok:
+            with lock:
+                errors.append(str(getattr(response, "status", response)))
+        return elapsed if ok else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    return [r for r in results if r is not None], errors, wall
+
+
+def server_counters(url):
+    # Counter lines from /metrics (requests, web searches, cache hits, errors, tokens)
+    import urllib3
+
+    try:
+        text = urllib3.request("GET", url + "/metrics", timeout=5).data.decode("utf-8")
+    except Exception:
+        return None
+    counters = {}
+    for line in text.splitlines():
+        if line.startswith("careassist_") and "_bucket" not in line and "_sum" not in line and "_count" not in line:
+            name, value = line.rsplit(" ", 1)
+            counters[name] = float(value)
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Target a running server instead of the stubbed in-process app.")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="JSONL file with a `query` field per line.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="One run per concurrency level.")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--cse-port", type=int, default=8765)
+    parser.add_argument("--passages", type=int, default=2000, help="Size of the in-memory vector store.")
+    parser.add_argument("--embed-ms", type=float, default=5)
+    parser.add_argument("--embedding-batch-size", type=int, default=32,
+                        help="Micro-batch concurrent query embeddings (1 = one encode call per query).")
+    parser.add_argument("--web-ms", type=float, default=300, help="Stub CSE latency; negative disables web search.")
+    parser.add_argument("--llm-ms", type=float, default=400, help="Fake ChatGroq time to first token.")
+    parser.add_argument("--llm-tokens", type=int, default=120)
+    parser.add_argument("--tokens-per-sec", type=float, default=300)
+    parser.add_argument("--faq", action="store_true", help="Serve canonical questions from the FAQ warm path.")
+    parser.add_argument("--warm-caches", action="store_true", help="Keep the answer and web search caches on.")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    url = args.url
+    memory = {"before": memory_mb()}
+    if url is None:
+        start_stub_app(args)
+        url = f"http://127.0.0.1:{args.port}"
+        memory["after_startup"] = memory_mb()
+    url = url.rstrip("/")
+
+    replay(url, queries, args.warmup, 1, args.timeout)
+
+    runs = []
+    for concurrency in args.concurrency:
+        latencies, errors, wall = replay(url, queries, args.requests, concurrency, args.timeout)
+        runs.append({
+            "concurrency": concurrency,
+            "ok": len(latencies),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:5],
+            "rps": round(len(latencies) / wall, 2),
+            **(percentiles(latencies) if latencies else {}),
+            "memory": memory_mb(),
+        })
+
+    memory["after"] = memory_mb()
+    results = {
+        "target": args.url or "in-process stub app",
+        "queries": len(queries),
+        "runs": runs,
+        # Client and server share this process in stub mode; with --url it is the client only
+        "memory": memory,
+        "server_counters": server_counters(url),
+    }
+    write_results(args.output, args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Micro-benchmarks for chunking, embedding batches, prompt building and the chunk store.
+
+Chunking and prompt building run on synthetic passages. Embeddings use the
+configured model (CAREASSIST_EMBEDDING_BACKEND) unless --stub-embeddings is given.
+
+    python -m benchmarks.micro --output benchmarks/results/micro.json
+"""
+import argparse
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.report import memory_mb, write_results
+from benchmarks.stubs import StubEmbeddings, synthetic_passages
+
+
+def timed(func, repeat):
+    # Best and median of `repeat` runs; the best is the least noisy number to compare
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return {"best_ms": round(min(times) * 1000, 3), "median_ms": round(statistics.median(times) * 1000, 3)}, result
+
+
+def synthetic_pages(n_pages):
+    from langchain_core.documents import Document
+
+    passages = synthetic_passages(n_pages * 4, sentences_per_passage=8)
+    pages = []
+    for page in range(n_pages):
+        # Four "sections" per page, each under a heading line
+        body = "\n\n".join(
+            f"{meta['section'].title()}\n{text}" for text, meta in passages[page * 4:(page + 1) * 4]
+        )
+        pages.append(Document(
+            page_content=body,
+            metadata={"source": "synthetic.pdf", "page": page, "total_pages": n_pages, "title": "Synthetic Handbook"}
+        ))
+    return pages
+
+
+def bench_chunking(args):
+    from src.chunking import structure_split
+    from src.helper import text_split
+
+    pages = synthetic_pages(args.pages)
+    chars = sum(len(p.page_content) for p in pages)
+    results = {}
+    for name, split in (("text_split", text_split), ("structure_split", structure_split)):
+        stats, chunks = timed(lambda: split(pages), args.repeat)
+        stats["chunks"] = len(chunks)
+        stats["mb_per_sec"] = round(chars / 2**20 / (stats["best_ms"] / 1000), 2)
+        results[name] = stats
+    return {"pages": len(pages), "chars": chars, **results}
+
+
+def bench_embeddings(args):
+    if args.stub_embeddings:
+        embeddings = StubEmbeddings(latency=0)
+    else:
+        from src.helper import download_gugging_face_embeddings
+
+        embeddings = download_gugging_face_embeddings(query_cache_size=0, batch_size=1)
+    texts = [text for text, _ in synthetic_passages(max(args.batch_sizes))]
+    embeddings.embed_documents(texts[:2])  # warm up the model
+    results = {}
+    for batch_size in args.batch_sizes:
+        stats, _ = timed(lambda: embeddings.embed_documents(texts[:batch_size]), args.repeat)
+        stats["texts_per_sec"] = round(batch_size / (stats["best_ms"] / 1000), 1)
+        results[str(batch_size)] = stats
+    stats, _ = timed(lambda: embeddings.embed_query("What are the symptoms of malaria?"), args.repeat)
+    results["query"] = stats
+    return results
+
+
+def bench_prompt(args):
+    from langchain_core.documents import Document
+
+    from src.context import assemble_messages
+    from src.memory import ChatMessage
+
+    passages = synthetic_passages(args.prompt_chunks)
+    scored = [(Document(page_content=text, metadata=meta), 0.9 - i * 0.01) for i, (text, meta) in enumerate(passages)]
+    web = [{"title": f"Result {i}", "snippet": f"Snippet {i} about malaria treatment.", "link": "https://example.org"}
+           for i in range(5)]
+    history = [ChatMessage("human" if i % 2 == 0 else "ai", f"Earlier message {i} about fever and malaria.")
+               for i in range(10)]
+    stats, (_, prompt_stats) = timed(
+        lambda: assemble_messages("What is the treatment for malaria?", scored, web, history), args.repeat
+    )
+    return {**stats, **prompt_stats}
+
+
+def _heap_bytes(build):
+    # Python heap held by whatever `build` returns (tracemalloc does not count mmapped files)
+    tracemalloc.start()
+    held = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, size
+
+
+def bench_chunk_store(args):
+    from langchain_core.documents import Document
+
+    from src.chunkstore import ChunkStore
+
+    n = args.store_chunks
+    passages = synthetic_passages(n)
+    ids = [f"{i:032x}" for i in range(n)]
+    texts = [text for text, _ in passages]
+    metadatas = [{**meta, "source_title": "Synthetic Handbook", "page_number": meta["page"] + 1} for _, meta in passages]
+
+    _, documents_bytes = _heap_bytes(lambda: [
+        Document(id=cid, page_content=text, metadata=dict(meta)) for cid, text, meta in zip(ids, texts, metadatas)
+    ])
+    results = {"chunks": n, "documents": {"heap_bytes_per_chunk": round(documents_bytes / n, 1)}}
+    path = tempfile.mkdtemp(prefix="careassist-chunks-")
+    try:
+        for compression in ("none", "zstd"):
+            try:
+                ChunkStore.build(ids, texts, metadatas, compression=compression).save(path)
+            except ImportError as e:
+                results[compression] = {"error": str(e)}
+                continue
+            store, store_bytes = _heap_bytes(lambda: ChunkStore.open(path))
+            rows = list(range(0, n, max(1, n // 1000)))
+            stats, _ = timed(lambda: [store.document(row) for row in rows], args.repeat)
+            results[compression] = {
+                "heap_bytes_per_chunk": round(store_bytes / n, 1),
+                "disk_bytes_per_chunk": round((store.stats()["stored_text_bytes"] + store.stats()["index_bytes"]) / n, 1),
+                "fetch_us_per_chunk": round(stats["best_ms"] * 1000 / len(rows), 2),
+            }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    # Bytes a top-k Pinecone response carries per query, with and without the chunk text in metadata
+    k = 10
+    with_text = sum(len(json.dumps({"id": ids[i], "score": 0.5, "metadata": {**metadatas[i], "text": texts[i]}}))
+                    for i in range(k))
+    ids_only = sum(len(json.dumps({"id": ids[i], "score": 0.5})) for i in range(k))
+    results["query_payload_bytes"] = {"k": k, "with_metadata": with_text, "ids_only": ids_only}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages to chunk.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--stub-embeddings", action="store_true", help="Time the hash stand-in, not the model.")
+    parser.add_argument("--prompt-chunks", type=int, default=10)
+    parser.add_argument("--store-chunks", type=int, default=100000, help="Synthetic chunks for the chunk store.")
+    parser.add_argument("--only", nargs="+", choices=("chunking", "embeddings", "prompt", "chunk_store"),
+                        default=["chunking", "embeddings", "prompt", "chunk_store"])
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    benches = {
+        "chunking": bench_chunking,
+        "embeddings": bench_embeddings,
+        "prompt": bench_prompt,
+        "chunk_store": bench_chunk_store,
+    }
+    results = {name: benches[name](args) for name in args.only}
+    results["memory"] = memory_mb()
+    write_results(args.output, args, results)
+
+
+if __name__ == "__main__":
+    main()
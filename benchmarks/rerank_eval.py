@@ -0,0 +1,84 @@
+"""Recall@k and added latency of the re-rank stage on a small labeled query set.
+
+A retrieved chunk counts as relevant when its text contains any of the query's
+`relevant` phrases (case-insensitive), so the labels survive re-chunking.
+Uses the configured vector backend and the real MiniLM model.
+
+    python -m benchmarks.rerank_eval --rerankers none,mmr,cross-encoder
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from src.helper import download_gugging_face_embeddings
+from src.rerank import RerankingRetriever
+from src.retrieval import load_retriever
+from src.vectorstore import load_vector_store
+
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rerank_eval.jsonl")
+
+
+def load_eval_set(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_relevant(doc, phrases):
+    text = doc.page_content.lower()
+    return any(phrase in text for phrase in phrases)
+
+
+def evaluate(retriever, embeddings, examples, k):
+    hits, latencies = 0, []
+    for example in examples:
+        query_vector = embeddings.embed_query(example["query"])
+        start = time.perf_counter()
+        results, _ = retriever.search(example["query"], query_vector, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(is_relevant(doc, example["relevant"]) for doc, _ in results)
+    ordered = sorted(latencies)
+    return {
+        f"recall@{k}": round(hits / len(examples), 3),
+        "p50_ms": round(statistics.median(ordered), 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eval-set", default=EVAL_SET)
+    parser.add_argument("--rerankers", default="none,mmr,cross-encoder")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    embeddings = download_gugging_face_embeddings()
+    docsearch = load_vector_store(embeddings)
+    examples = load_eval_set(args.eval_set)
+
+    results = {}
+    for kind in args.rerankers.split(","):
+        retriever = load_retriever(docsearch, embeddings, reranker=kind)
+        if isinstance(retriever, RerankingRetriever):
+            # Lift the budget so every query is re-ranked and the full cost is visible
+            retriever.budget_ms = float("inf")
+        # Warm-up so model loading is not billed to the first query
+        retriever.search("warm up", embeddings.embed_query("warm up"), k=args.k)
+        results[kind] = evaluate(retriever, embeddings, examples, args.k)
+
+    baseline = results.get("none", {}).get("p50_ms")
+    if baseline is not None:
+        for kind, row in results.items():
+            row["added_p50_ms"] = round(row["p50_ms"] - baseline, 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Cold-start benchmark for the web entry points.
+
+Each scenario runs in a fresh interpreter so import caches do not leak between
+them. Compares the import set app.py used to load eagerly against a real
+`import app` (pipeline built on a small local index, with the embedding model
+replaced by a stub so its load is timed separately), model load time per
+embedding backend, and cold vs. memoized query embeddings.
+
+    python -m benchmarks.startup --output benchmarks/results/startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imported at module level before the startup work
+EAGER_IMPORTS = """
+import flask
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_pinecone import PineconeVectorStore
+from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+from langchain_groq import ChatGroq
+from googleapiclient.discovery import build
+from langchain_classic.chains import create_retrieval_chain
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_classic.memory import ConversationBufferWindowMemory
+"""
+
+# The real entry point: imports, config and the whole pipeline, minus the embedding model
+APP_IMPORT = """
+import src.helper
+from benchmarks.stubs import StubEmbeddings
+src.helper._load_embedding_model = lambda *args, **kwargs: StubEmbeddings(latency=0)
+import app
+"""
+
+MODEL_LOAD = """
+from src.helper import download_gugging_face_embeddings
+download_gugging_face_embeddings()
+"""
+
+QUERY_EMBED = """
+import time
+from src.helper import download_gugging_face_embeddings
+embeddings = download_gugging_face_embeddings()
+queries = ["what are the symptoms of malaria", "how is diabetes managed", "what is hypertension"] * 10
+start = time.perf_counter()
+for q in queries[:3]:
+    embeddings.embed_query(q)
+cold = (time.perf_counter() - start) / 3
+start = time.perf_counter()
+for q in queries[3:]:
+    embeddings.embed_query(q)
+warm = (time.perf_counter() - start) / (len(queries) - 3)
+print(f"RESULT cold_ms={cold * 1000:.3f} cached_ms={warm * 1000:.3f}")
+"""
+
+TIMED = """
+import time
+_start = time.perf_counter()
+{body}
+print(f"RESULT seconds={{time.perf_counter() - _start:.4f}}")
+"""
+
+
+def run(code, env=None, timed=True):
+    source = TIMED.format(body=code) if timed else code
+    proc = subprocess.run(
+        [sys.executable, "-c", source],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return {k: float(v) for k, v in (item.split("=") for item in line.split()[1:])}
+    return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def best_of(code, repeat, env=None):
+    runs = [run(code, env) for _ in range(repeat)]
+    ok = [r["seconds"] for r in runs if "seconds" in r]
+    return {"seconds": min(ok), "runs": len(ok)} if ok else runs[-1]
+
+
+def app_env(path):
+    # A tiny local index and fresh artifacts, so `import app` needs neither Pinecone nor earlier state
+    from benchmarks.stubs import StubEmbeddings, synthetic_passages
+    from src.vectorstore import LocalVectorStore
+
+    passages = synthetic_passages(100)
+    texts = [text for text, _ in passages]
+    index_dir = os.path.join(path, "local_index")
+    LocalVectorStore.save(
+        index_dir, [str(i) for i in range(len(texts))], texts, [meta for _, meta in passages],
+        StubEmbeddings(latency=0).embed_documents(texts)
+    )
+    return {
+        "CAREASSIST_ARTIFACTS_DIR": path,
+        "CAREASSIST_VECTOR_BACKEND": "local",
+        "CAREASSIST_LOCAL_INDEX_DIR": index_dir,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "startup-benchmark"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backends", default="torch,onnx", help="Comma-separated embedding backends to time.")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    artifacts = tempfile.mkdtemp(prefix="careassist-startup-")
+    try:
+        app_import = best_of(APP_IMPORT, args.repeat, app_env(artifacts))
+    finally:
+        shutil.rmtree(artifacts, ignore_errors=True)
+    results = {
+        "imports_eager": best_of(EAGER_IMPORTS, args.repeat),
+        "app_import": app_import,
+        "model_load": {
+            backend: best_of(MODEL_LOAD, args.repeat, {"CAREASSIST_EMBEDDING_BACKEND": backend})
+            for backend in args.backends.split(",")
+        },
+        "query_embedding": run(QUERY_EMBED, timed=False),
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Deterministic local stand-ins for the embedding model, vector store, web search and Groq."""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.documents import Document
+
+
+class StubEmbeddings:
+    """Hash vectors, timed like a CPU-bound model: one encode call at a time, batches amortize the overhead."""
+
+    def __init__(self, latency=0.005, dim=384):
+        self.latency = latency
+        self.dim = dim
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [((digest[i % len(digest)] / 255.0) - 0.5) for i in range(self.dim)]
+
+    def embed_query(self, text):
+        with self._lock:
+            time.sleep(self.latency)
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        with self._lock:
+            time.sleep(self.latency * max(1, len(texts) // 8))
+        return [self._vector(t) for t in texts]
+
+
+class StubVectorStore:
+    def __init__(self, latency=0.03, hits=3):
+        self.latency = latency
+        self.hits = hits
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, **kwargs):
+        time.sleep(self.latency)
+        return [
+            (
+                Document(page_content=f"Stub PDF passage {i} about the question.", metadata={"source": "stub.pdf", "page": i}),
+                0.9 - 0.1 * i
+            )
+            for i in range(min(k, self.hits))
+        ]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+
+TOPICS = (
+    "malaria", "typhoid fever", "hypertension", "type 2 diabetes", "asthma", "tuberculosis",
+    "cholera", "sickle cell disease", "HIV", "hepatitis B", "measles", "anaemia",
+)
+
+SENTENCES = (
+    "{topic} is a common condition seen in primary care clinics.",
+    "Typical symptoms of {topic} include fever, fatigue and loss of appetite.",
+    "Diagnosis of {topic} relies on the clinical history and laboratory tests.",
+    "Treatment of {topic} should follow national guidelines and be supervised by a clinician.",
+    "Prevention of {topic} focuses on hygiene, vaccination where available and early screening.",
+    "Complications of {topic} are more likely in children, pregnant women and older adults.",
+)
+
+
+def synthetic_passages(n, sentences_per_passage=6):
+    """Deterministic medical-sounding passages as (text, metadata) pairs."""
+    passages = []
+    for i in range(n):
+        topic = TOPICS[i % len(TOPICS)]
+        body = " ".join(
+            SENTENCES[(i + j) % len(SENTENCES)].format(topic=topic).capitalize()
+            for j in range(sentences_per_passage)
+        )
+        passages.append((f"Passage {i}. {body}", {"source": "synthetic.pdf", "page": i // 4, "section": topic}))
+    return passages
+
+
+def in_memory_vector_store(embeddings, n=2000):
+    """A real LocalVectorStore over synthetic passages, held in RAM instead of memory-mapped."""
+    from src.vectorstore import LocalVectorStore
+
+    passages = synthetic_passages(n)
+    return LocalVectorStore.from_texts(
+        [text for text, _ in passages], embeddings, metadatas=[meta for _, meta in passages]
+    )
+
+
+class StubWebSearch:
+    def __init__(self, latency=0.3):
+        self.latency = latency
+
+    def __call__(self, query):
+        time.sleep(self.latency)
+        return [{"title": "Stub result", "snippet": f"Snippet for {query}", "link": "https://example.org"}]
+
+
+class StubMessage:
+    def __init__(self, content, usage_metadata=None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class StubLLM:
+    """Stands in for ChatGroq.
+
+    Without `tokens_per_sec` every call takes `latency` seconds in total. With it,
+    `latency` is the time to first token and the `tokens` words follow at that rate.
+    """
+
+    def __init__(self, latency=0.5, tokens=40, tokens_per_sec=None):
+        self.latency = latency
+        self.tokens = tokens
+        self.tokens_per_sec = tokens_per_sec
+
+    def _words(self, messages):
+        words = f"Stub answer ({len(messages[-1][1])} prompt chars). Please consult a doctor.".split(" ")
+        return words + ["..."] * max(0, self.tokens - len(words))
+
+    def _total_latency(self, n):
+        return self.latency + (n / self.tokens_per_sec if self.tokens_per_sec else 0.0)
+
+    def _reply(self, messages):
+        words = self._words(messages)
+        return StubMessage(" ".join(words), usage_metadata={"output_tokens": len(words)})
+
+    def invoke(self, messages, **kwargs):
+        reply = self._reply(messages)
+        time.sleep(self._total_latency(reply.usage_metadata["output_tokens"]))
+        return reply
+
+    async def ainvoke(self, messages, **kwargs):
+        reply = self._reply(messages)
+        await asyncio.sleep(self._total_latency(reply.usage_metadata["output_tokens"]))
+        return reply
+
+    def stream(self, messages, **kwargs):
+        words = self._words(messages)
+        if self.tokens_per_sec:
+            delays = [self.latency] + [1 / self.tokens_per_sec] * (len(words) - 1)
+        else:
+            # Same total latency as invoke(), spread evenly over the tokens
+            delays = [self.latency / len(words)] * len(words)
+        for i, (word, delay) in enumerate(zip(words, delays)):
+            time.sleep(delay)
+            yield StubMessage(word if i == 0 else " " + word)
+
+
+def serve_stub_cse(host="127.0.0.1", port=8765, latency=0.3):
+    """Start a Custom Search JSON API look-alike in a daemon thread; returns the server.
+
+    Point the apps at it with CAREASSIST_WEB_SEARCH_BACKEND=http and
+    CAREASSIST_WEB_SEARCH_URL=http://127.0.0.1:8765/customsearch/v1.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            params = parse_qs(urlparse(self.path).query)
+            query = params.get("q", [""])[0]
+            num = int(params.get("num", ["5"])[0])
+            time.sleep(latency)
+            body = json.dumps({
+                "items": [
+                    {"title": f"Stub result {i}", "snippet": f"Snippet {i} for {query}", "link": f"https://example.org/{i}"}
+                    for i in range(num)
+                ]
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,119 @@
+"""CareAssist from the terminal, on the same pipeline as app.py and dashboard.py.
+
+    python cli.py ask "What are the symptoms of malaria?"
+    python cli.py chat
+    python cli.py batch questions.jsonl answers.jsonl --concurrency 8
+    python cli.py faq
+"""
+import argparse
+import json
+import sys
+import uuid
+
+from dotenv import load_dotenv
+
+
+def ask(engine, args):
+    if args.no_stream:
+        print(engine.answer(args.query))
+        return
+    for token in engine.answer_stream(args.query):
+        print(token, end="", flush=True)
+    print()
+
+
+def chat(engine, args):
+    # One session for the whole conversation, so follow-up questions see the last turns
+    session_id = uuid.uuid4().hex
+    print("CareAssist AI. Type your health question, /clear to forget the conversation, /quit to leave.")
+    while True:
+        try:
+            user_query = input("\nYou: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if not user_query:
+            continue
+        if user_query in ("/quit", "/exit"):
+            break
+        if user_query == "/clear":
+            engine.clear(session_id)
+            continue
+        print("CareAssist: ", end="", flush=True)
+        try:
+            for token in engine.answer_stream(user_query, session_id):
+                print(token, end="", flush=True)
+            print()
+        except Exception as e:
+            print(f"\n[error] {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def batch(engine, args):
+    from src.batch import run_batch
+
+    stats = run_batch(
+        engine,
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        embed_batch_size=args.embed_batch_size,
+        max_retries=args.retries,
+        resume=not args.restart,
+        use_caches=args.use_caches
+    )
+    print(json.dumps(stats, indent=2))
+
+
+def faq(engine, args):
+    # Build (or bring up to date) the FAQ warm-path index now instead of waiting for the app to do it
+    if engine.faq is None:
+        sys.exit("The FAQ warm path is disabled (CAREASSIST_FAQ=0).")
+    # Waits for a build another process (e.g. a running app) has in progress instead of skipping
+    engine.refresh(block=True)
+    print(json.dumps(engine.faq.stats(), indent=2))
+
+
+def parse_args(argv=None):
+    from src.config import BATCH_CONCURRENCY, BATCH_EMBED_SIZE, BATCH_MAX_RETRIES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ask_parser = commands.add_parser("ask", help="Answer one question and exit.")
+    ask_parser.add_argument("query")
+    ask_parser.add_argument("--no-stream", action="store_true", help="Print the answer only once it is complete.")
+    ask_parser.set_defaults(func=ask)
+
+    chat_parser = commands.add_parser("chat", help="Interactive conversation with session memory.")
+    chat_parser.set_defaults(func=chat)
+
+    batch_parser = commands.add_parser(
+        "batch", help="Answer a JSONL file of questions ({\"id\", \"question\"} per line) in parallel."
+    )
+    batch_parser.add_argument("input")
+    batch_parser.add_argument("output", help="JSONL answers, appended as they finish.")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Questions answered at once.")
+    batch_parser.add_argument("--embed-batch-size", type=int, default=BATCH_EMBED_SIZE, help="Questions per encode call.")
+    batch_parser.add_argument("--retries", type=int, default=BATCH_MAX_RETRIES, help="LLM retries on rate limits.")
+    batch_parser.add_argument("--restart", action="store_true",
+                              help="Overwrite the output instead of resuming after the questions already answered.")
+    batch_parser.add_argument("--use-caches", action="store_true",
+                              help="Reuse (and fill) the answer cache and stored FAQ answers instead of asking the LLM.")
+    batch_parser.set_defaults(func=batch)
+
+    faq_parser = commands.add_parser("faq", help="Precompute the FAQ warm-path index for faq_questions.txt.")
+    faq_parser.set_defaults(func=faq)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv()
+
+    from src.engine import get_pipeline
+
+    args.func(get_pipeline(), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# gunicorn -c gunicorn.conf.py app:app
+import gc
+import os
+
+from src.helper import download_gugging_face_embeddings
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = 120
+
+# Load the sentence-transformer once in the master process. Workers are forked
+# afterwards and find the model already in memory (shared copy-on-write), while
+# network clients (Pinecone, Groq) are still created per worker after the fork.
+# No inference runs here, so torch's thread pools are not started before forking.
+download_gugging_face_embeddings()
+
+# Move everything loaded so far out of the GC's reach, so collections in the
+# workers do not touch (and un-share) the preloaded pages.
+gc.freeze()
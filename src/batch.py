@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from src.config import (
+    BATCH_BACKOFF_BASE, BATCH_BACKOFF_MAX, BATCH_CONCURRENCY, BATCH_EMBED_SIZE, BATCH_MAX_RETRIES
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# === Input / Resume ===
+def read_questions(path, skip=()):
+    """Yields (id, question, error) from JSONL with a `question` (or `query`) field.
+
+    `id` defaults to the line number. A line that is not a JSON object with a question
+    comes back with question None and the reason in `error`, so one bad line does not end the run.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record, error = {}, f"line {line_no}: invalid JSON ({e.msg})"
+            else:
+                if not isinstance(record, dict):
+                    record, error = {}, f"line {line_no}: expected a JSON object"
+                else:
+                    error = None
+            qid = str(record.get("id", line_no))
+            if qid in skip:
+                continue
+            question = record.get("question") or record.get("query")
+            if error is None and not isinstance(question, str):
+                error = f"line {line_no}: no `question` or `query` string"
+            yield qid, (question if error is None else None), error
+
+
+def completed_ids(output_path):
+    # The last record per id wins, so a failure that later succeeded counts as done
+    status = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Half-written last line from a crash; that question is simply asked again
+                continue
+            status[record["id"]] = "error" not in record
+    return {qid for qid, ok in status.items() if ok}
+
+
+# === Rate-limit-aware Retry ===
+def retry_after(exc):
+    """Seconds to wait before retrying `exc`, or None if it is not worth retrying."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    name = type(exc).__name__
+    if status == 429 or name == "RateLimitError":
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return 0.0
+    if (status is not None and status >= 500) or name in ("APIConnectionError", "APITimeoutError", "TimeoutError"):
+        return 0.0
+    return None
+
+
+class RetryingLLM:
+    """Wraps a chat model so `invoke` backs off and retries on rate limits and transient errors."""
+
+    def __init__(self, llm, max_retries=BATCH_MAX_RETRIES, base=BATCH_BACKOFF_BASE, cap=BATCH_BACKOFF_MAX):
+        self.llm = llm
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+        self.retries = 0
+
+    def invoke(self, messages, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.llm.invoke(messages, **kwargs)
+            except Exception as e:
+                hint = retry_after(e)
+                if hint is None or attempt == self.max_retries:
+                    raise
+                # Full jitter keeps parallel workers from retrying in lockstep; a Retry-After hint is a floor
+                delay = max(hint, random.uniform(0, min(self.cap, self.base * 2 ** attempt)))
+                self.retries += 1
+                logger.warning("LLM call failed (%s), retry %d in %.1fs", type(e).__name__, attempt + 1, delay)
+                time.sleep(delay)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+# === Batch Runner ===
+def _answer_one(engine, qid, question, query_vector):
+    start = time.perf_counter()
+    try:
+        answer = engine.answer(question, query_vector=query_vector)
+        record = {"id": qid, "question": question, "answer": answer}
+    except Exception as e:
+        record = {"id": qid, "question": question, "error": f"{type(e).__name__}: {e}"}
+    record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+def run_batch(engine, input_path, output_path, concurrency=BATCH_CONCURRENCY, embed_batch_size=BATCH_EMBED_SIZE,
+              max_retries=BATCH_MAX_RETRIES, resume=True, use_caches=False):
+    """Answers every question in `input_path`, appending one JSON line per answer to `output_path`.
+
+    Questions are embedded `embed_batch_size` at a time; retrieval and the LLM call run on
+    `concurrency` threads. Results are flushed as they finish, so a rerun with `resume`
+    only asks what is missing or failed. Unless `use_caches`, every answer is generated
+    fresh: the semantic answer cache and stored FAQ answers are neither read nor written.
+    """
+    done = completed_ids(output_path) if resume else set()
+    components = {} if use_caches else {"answer_cache": None, "faq": None}
+    engine = engine.replace(llm=RetryingLLM(engine.llm, max_retries=max_retries), memory=None, **components)
+    questions = read_questions(input_path, skip=done)
+    stats = {"skipped": len(done), "answered": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+
+        def drain(block_until):
+            nonlocal pending
+            while len(pending) > block_until:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    stats["failed" if "error" in record else "answered"] += 1
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+        while True:
+            batch = list(islice(questions, embed_batch_size))
+            if not batch:
+                break
+            # One encode call for the whole group instead of one per question
+            for qid, _, error in batch:
+                if error is not None:
+                    stats["failed"] += 1
+                    out.write(json.dumps({"id": qid, "error": error}, ensure_ascii=False) + "\n")
+            batch = [(qid, question) for qid, question, error in batch if error is None]
+            vectors = engine.embeddings.embed_documents([question for _, question in batch]) if batch else []
+            for (qid, question), vector in zip(batch, vectors):
+                pending.add(pool.submit(_answer_one, engine, qid, question, vector))
+            # Bounded look-ahead: the input is streamed, never loaded whole
+            drain(block_until=concurrency)
+        drain(block_until=0)
+
+    elapsed = time.perf_counter() - start
+    processed = stats["answered"] + stats["failed"]
+    return {
+        **stats,
+        "llm_retries": engine.llm.retries,
+        "seconds": round(elapsed, 2),
+        "questions_per_sec": round(processed / elapsed, 2) if elapsed else 0.0,
+    }
@@ -0,0 +1,153 @@
+import json
+import math
+import os
+import re
+import numpy as np
+
+from src.chunkstore import ChunkStore
+from src.ingest import DoneFuture
+
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its of on or "
+    "should so than that the their them then there these they this to was were what when where which "
+    "who why will with you your".split()
+)
+
+
+def tokenize(text):
+    # Keeps hyphenated and alphanumeric medical terms (e.g. "beta-blockers", "covid-19") whole
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over chunk text, stored as a CSR term -> (chunk, tf) posting matrix."""
+
+    def __init__(self, chunks, vocab, indptr, postings, tfs, doc_lens, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.vocab = vocab
+        self.indptr = indptr
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.avgdl = float(doc_lens.mean()) if len(doc_lens) else 0.0
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, ids, texts, metadatas):
+        term_docs = {}
+        doc_lens = np.zeros(len(ids), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens[row] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_docs.setdefault(token, []).append((row, count))
+
+        vocab, indptr, postings, tfs = {}, [0], [], []
+        for term in sorted(term_docs):
+            vocab[term] = len(vocab)
+            for row, count in term_docs[term]:
+                postings.append(row)
+                tfs.append(count)
+            indptr.append(len(postings))
+        return cls(
+            ChunkStore.build(list(ids), texts, list(metadatas)), vocab,
+            np.asarray(indptr, dtype=np.int64), np.asarray(postings, dtype=np.int32),
+            np.asarray(tfs, dtype=np.float32), doc_lens
+        )
+
+    # === Persistence ===
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        # Written under temporary names and swapped in with os.replace, so a reader (or a crash)
+        # never sees a half-written file; the chunk store swaps its own files the same way
+        np.savez(
+            os.path.join(path, "postings.tmp.npz"),
+            indptr=self.indptr, postings=self.postings, tfs=self.tfs, doc_lens=self.doc_lens
+        )
+        with open(os.path.join(path, "vocab.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump(list(self.vocab), f)
+        self.chunks.save(os.path.join(path, "chunks"))
+        os.replace(os.path.join(path, "vocab.tmp.json"), os.path.join(path, "vocab.json"))
+        os.replace(os.path.join(path, "postings.tmp.npz"), os.path.join(path, "postings.npz"))
+        if os.path.exists(os.path.join(path, "chunks.jsonl")):
+            os.remove(os.path.join(path, "chunks.jsonl"))
+
+    @classmethod
+    def load(cls, path):
+        arrays = np.load(os.path.join(path, "postings.npz"))
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = {term: row for row, term in enumerate(json.load(f))}
+        if ChunkStore.exists(os.path.join(path, "chunks")):
+            chunks = ChunkStore.open(os.path.join(path, "chunks"))
+        else:
+            # Index written before the chunk store existed
+            chunks = ChunkStore.from_jsonl(os.path.join(path, "chunks.jsonl"))
+        return cls(
+            chunks, vocab,
+            arrays["indptr"], arrays["postings"], arrays["tfs"], arrays["doc_lens"]
+        )
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "postings.npz"))
+
+    # === Search ===
+    def search(self, query, k=10):
+        # Returns [(Document, bm25_score)] best first; chunks sharing no term are never returned
+        n = len(self.chunks)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            row = self.vocab.get(term)
+            if row is None:
+                continue
+            start, end = self.indptr[row], self.indptr[row + 1]
+            docs, tf = self.postings[start:end], self.tfs[start:end]
+            df = end - start
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lens[docs] / self.avgdl)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks.document(int(i)), float(scores[i])) for i in top]
+
+
+class BM25Writer:
+    """Index-shaped sink for StreamingUpserter; rebuilds the BM25 index on save()."""
+
+    def __init__(self, path, text_key="text"):
+        self.path = path
+        self.text_key = text_key
+        self.records = {}
+        if BM25Index.exists(path):
+            for record in BM25Index.load(path).chunks.records():
+                self.records[record.id] = (record.page_content, record.metadata)
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        for cid, _, metadata in vectors:
+            metadata = dict(metadata)
+            self.records[cid] = (metadata.pop(self.text_key, ""), metadata)
+        return DoneFuture() if async_req else None
+
+    def delete(self, ids, namespace=None, **kwargs):
+        for cid in ids:
+            self.records.pop(cid, None)
+
+    def save(self):
+        ids = list(self.records)
+        BM25Index.build(
+            ids, [self.records[cid][0] for cid in ids], [self.records[cid][1] for cid in ids]
+        ).save(self.path)
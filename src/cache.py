@@ -0,0 +1,172 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.config import (
+    ANSWER_CACHE_DIR, ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL
+)
+from src.helper import normalize
+
+
+class SemanticCache:
+    """Answer cache keyed by query embedding: a hit is any stored query within `threshold` cosine.
+
+    Lookups only touch the in-memory matrix. With a `path`, each stored answer is also appended
+    to an SQLite table there (one row per answer, WAL mode, as in src/memory.py), which a
+    restarted worker loads back; the lookup lock is never held while writing to disk.
+    """
+
+    def __init__(self, path=None, threshold=0.92, ttl=24 * 3600, max_entries=2000):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # key -> {"query", "answer", "created"}; ordered oldest-used first for LRU eviction
+        self._entries = OrderedDict()
+        self._vectors = {}
+        self._matrix = None
+        self._keys = []
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_evict = 0.0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answers ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                    " query TEXT NOT NULL, answer TEXT NOT NULL, vector BLOB NOT NULL, created REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS answers_created ON answers (created)")
+            self._load()
+
+    # === Lookup / Store ===
+    def lookup(self, query_vector):
+        vector = normalize(query_vector)
+        with self._lock:
+            self._expire()
+            if self._entries:
+                scores = self._index() @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = self._keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]["answer"]
+            self.misses += 1
+            return None
+
+    def store(self, query_vector, query, answer):
+        vector = normalize(query_vector)
+        entry = {"query": query, "answer": answer, "created": time.time()}
+        with self._lock:
+            key = str(self._next_key)
+            self._next_key += 1
+            self._entries[key] = entry
+            self._vectors[key] = vector
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._vectors[evicted]
+            self._matrix = None
+        if self.path:
+            self._append(vector, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrix = None
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM answers")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+    # === Internals ===
+    def _index(self):
+        # Stacked lazily and reused until the next store/evict
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._vectors[key] for key in self._keys])
+        return self._matrix
+
+    def _expire(self):
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry["created"] < cutoff]
+        for key in expired:
+            del self._entries[key]
+            del self._vectors[key]
+        if expired:
+            self._matrix = None
+
+    def _connect(self):
+        # One connection per thread; WAL lets every worker append while the others read
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "answers.sqlite3"), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _append(self, vector, entry):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO answers (query, answer, vector, created) VALUES (?, ?, ?, ?)",
+                (entry["query"], entry["answer"], vector.astype(np.float32).tobytes(), entry["created"])
+            )
+        self._evict()
+
+    def _evict(self, interval=60):
+        # Trims expired rows and all but the newest max_entries, at most once per interval per worker
+        now = time.time()
+        if now - self._last_evict < interval:
+            return
+        self._last_evict = now
+        with self._connect() as conn:
+            if self.ttl:
+                conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def _load(self):
+        cutoff = time.time() - self.ttl if self.ttl else 0.0
+        rows = self._connect().execute(
+            "SELECT query, answer, vector, created FROM answers WHERE created >= ? ORDER BY id DESC LIMIT ?",
+            (cutoff, self.max_entries)
+        ).fetchall()
+        for query, answer, vector, created in reversed(rows):
+            key = str(self._next_key)
+            self._next_key += 1
+            self._entries[key] = {"query": query, "answer": answer, "created": created}
+            self._vectors[key] = np.frombuffer(vector, dtype=np.float32)
+
+
+def load_answer_cache():
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    return SemanticCache(
+        path=ANSWER_CACHE_DIR,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl=ANSWER_CACHE_TTL,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES
+    )
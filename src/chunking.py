@@ -0,0 +1,176 @@
+import os
+import re
+
+from langchain_core.documents import Document
+
+from src.config import CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, CHUNKER
+from src.context import estimate_tokens
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+[A-Za-z]")
+
+
+def chunker_signature(chunker=CHUNKER):
+    # Stored in the ingest manifest so changing the chunker re-chunks every file. Bump the
+    # revision when structure_split's output changes for the same settings
+    if chunker == "structure":
+        return f"structure.2:{CHUNK_TOKENS}:{CHUNK_OVERLAP_TOKENS}:{CHUNK_MIN_TOKENS}"
+    return "recursive:1000:200"
+
+
+# === Structure Detection ===
+def is_heading(line):
+    line = line.strip()
+    if not line or len(line) > 80 or line.endswith((".", ",", ";")):
+        return False
+    words = line.split()
+    if len(words) > 10:
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    # Short capitalised label such as "Diagnosis" or "Causes and symptoms"
+    if len(line) <= 40 and len(words) <= 4 and line[0].isupper() and line[-1].isalnum():
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if letters and sum(c.isupper() for c in letters) / len(letters) > 0.8:
+        return True
+    # Title Case: most words capitalised
+    alpha_words = [w for w in words if w[0].isalpha()]
+    capitalised = sum(w[0].isupper() for w in alpha_words)
+    return len(alpha_words) >= 2 and capitalised / len(alpha_words) >= 0.75 and not line.endswith(":")
+
+
+def split_blocks(text):
+    """Yields ("heading" | "paragraph", text) for one page of extracted text."""
+    lines = [line.rstrip() for line in text.splitlines()]
+    paragraph = []
+
+    def flush():
+        if paragraph:
+            yield "paragraph", " ".join(part.strip() for part in paragraph)
+            paragraph.clear()
+
+    for i, line in enumerate(lines):
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        if not line.strip():
+            yield from flush()
+        elif (is_heading(line) and (not paragraph or paragraph[-1].rstrip().endswith((".", ":", "?", "!")))
+              and not next_line.lstrip()[:1].islower()):
+            # A heading-like line the next line continues in lowercase is the start of a wrapped sentence
+            yield from flush()
+            yield "heading", line.strip()
+        else:
+            paragraph.append(line)
+            # PDF text rarely has blank lines: a short line ending a sentence closes the paragraph
+            if line.rstrip().endswith((".", "?", "!", ":")) and len(line) < 0.7 * max(len(next_line), 60):
+                yield from flush()
+    yield from flush()
+
+
+def split_sentences(text, max_tokens):
+    # Paragraphs longer than a chunk are cut at sentence boundaries (words as a last resort)
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        while estimate_tokens(sentence) > max_tokens:
+            cut = sentence.rfind(" ", 0, max_tokens * 4)
+            cut = cut if cut > 0 else max_tokens * 4
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and estimate_tokens(current) + estimate_tokens(sentence) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _tail(text, overlap_tokens):
+    # Last whole sentence(s) within the overlap budget, carried into the next chunk
+    if overlap_tokens <= 0:
+        return ""
+    sentences = _SENTENCE_END.split(text)
+    tail = ""
+    for sentence in reversed(sentences):
+        candidate = f"{sentence} {tail}".strip()
+        if estimate_tokens(candidate) > overlap_tokens:
+            break
+        tail = candidate
+    return tail
+
+
+# === Chunking ===
+def structure_split(pages, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+                    min_tokens=CHUNK_MIN_TOKENS):
+    """Chunk PDF pages along headings and paragraphs; chunks never span a page or a section."""
+    chunks = []
+    section = None
+    for page in pages:
+        base = {
+            key: value for key, value in page.metadata.items()
+            if key in ("source", "page", "page_label", "total_pages")
+        }
+        source = base.get("source", "")
+        title = str(page.metadata.get("title") or "").strip()
+        if not title or title.lower() == "untitled":
+            title = os.path.splitext(os.path.basename(source))[0]
+        base["source_title"] = title
+        if isinstance(base.get("page"), int):
+            base["page_number"] = base["page"] + 1
+
+        # parts[:lead] is the carried overlap or the section heading, not new text of this chunk
+        parts, carry, lead = [], "", 0
+
+        def emit():
+            nonlocal carry, lead
+            body = " ".join(parts[lead:]).strip()
+            if body:
+                text = " ".join(parts).strip()
+                metadata = dict(base)
+                if section:
+                    metadata["section"] = section
+                if chunks and estimate_tokens(text) < min_tokens and _same_place(chunks[-1].metadata, metadata):
+                    # Too small to stand alone: fold into the previous chunk of the same section. The
+                    # carry already ends that chunk, so only the new text is appended
+                    chunks[-1].page_content += "\n" + body
+                else:
+                    chunks.append(Document(page_content=text, metadata=metadata))
+                carry = _tail(chunks[-1].page_content, overlap_tokens)
+            parts.clear()
+            lead = 0
+
+        for kind, text in split_blocks(page.page_content):
+            if kind == "heading":
+                emit()
+                carry = ""
+                section = text[:120]
+                # The heading also opens the chunk text, so it stays searchable and readable in context
+                parts.append(text)
+                lead = 1
+                continue
+            for piece in split_sentences(text, chunk_tokens):
+                size = sum(estimate_tokens(p) for p in parts)
+                if len(parts) > lead and size + estimate_tokens(piece) > chunk_tokens:
+                    emit()
+                if not parts and carry:
+                    parts.append(carry)
+                    lead = 1
+                parts.append(piece)
+        emit()
+    return chunks
+
+
+def _same_place(a, b):
+    return (a.get("source"), a.get("page"), a.get("section")) == (b.get("source"), b.get("page"), b.get("section"))
+
+
+def split_pages(pages, chunker=CHUNKER):
+    if chunker == "structure":
+        return structure_split(pages)
+    if chunker == "recursive":
+        from src.helper import text_split
+
+        return text_split(pages)
+    raise ValueError(f"Unknown chunker: {chunker!r} (expected 'structure' or 'recursive')")
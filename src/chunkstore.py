@@ -0,0 +1,287 @@
+import json
+import mmap
+import os
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import CHUNK_STORE_BLOCK_BYTES, CHUNK_STORE_COMPRESSION
+from src.ingest import DoneFuture
+
+
+CHUNK_STORE_VERSION = 1
+COMPRESSIONS = ("none", "zstd")
+
+# Metadata column kinds: int64 values, or int32 indexes into the shared string table
+# ("str" for strings, "json" for anything else, e.g. floats, bools and lists)
+INT_MISSING = np.iinfo(np.int64).min
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd chunk store compression needs the `zstandard` package (pip install zstandard)") from e
+    return zstandard
+
+
+class ChunkRecord:
+    """One chunk, shaped like a LangChain Document without its per-object overhead."""
+
+    __slots__ = ("id", "page_content", "metadata")
+
+    def __init__(self, id, page_content, metadata):
+        self.id = id
+        self.page_content = page_content
+        self.metadata = metadata
+
+    def to_document(self):
+        return Document(id=self.id, page_content=self.page_content, metadata=self.metadata)
+
+
+class ChunkStore:
+    """Row-addressed chunk text and metadata in flat arrays instead of per-chunk Python objects.
+
+    Text is one contiguous UTF-8 blob (optionally zstd-compressed in blocks that never split
+    a chunk) located by an offset array; IDs are a fixed-width byte array with a sorted copy
+    for lookups; each metadata key is one column. Opened from disk, every part is
+    memory-mapped, so resident memory grows with the chunks actually read.
+    """
+
+    def __init__(self, blob, offsets, ids, sorted_ids, id_order, columns, strings, compression="none",
+                 block_of=None, block_starts=None, block_offsets=None):
+        self.blob = blob
+        self.offsets = offsets
+        self.ids = ids
+        self.sorted_ids = sorted_ids
+        self.id_order = id_order
+        self.columns = columns
+        self.strings = strings
+        self.compression = compression
+        self.block_of = block_of
+        self.block_starts = block_starts
+        self.block_offsets = block_offsets
+        if compression == "zstd":
+            self._decompressor = _zstd().ZstdDecompressor()
+            self._block = lru_cache(maxsize=64)(self._read_block)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # === Reading ===
+    def chunk_id(self, row):
+        return self.ids[row].decode("utf-8")
+
+    def text(self, row):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        if self.compression == "none":
+            return bytes(self.blob[start:end]).decode("utf-8")
+        block = int(self.block_of[row])
+        base = int(self.block_starts[block])
+        return self._block(block)[start - base:end - base].decode("utf-8")
+
+    def _read_block(self, block):
+        start, end = int(self.block_offsets[block]), int(self.block_offsets[block + 1])
+        return self._decompressor.decompress(bytes(self.blob[start:end]))
+
+    def metadata(self, row):
+        metadata = {}
+        for key, (kind, column) in self.columns.items():
+            value = column[row]
+            if kind == "int":
+                if value != INT_MISSING:
+                    metadata[key] = int(value)
+            elif value >= 0:
+                metadata[key] = self.strings[value] if kind == "str" else json.loads(self.strings[value])
+        return metadata
+
+    def record(self, row):
+        return ChunkRecord(self.chunk_id(row), self.text(row), self.metadata(row))
+
+    def document(self, row):
+        return Document(id=self.chunk_id(row), page_content=self.text(row), metadata=self.metadata(row))
+
+    def records(self):
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def row_of(self, chunk_id):
+        # Binary search over the sorted IDs; None if the chunk is not in the store
+        key = chunk_id.encode("utf-8")
+        pos = int(np.searchsorted(self.sorted_ids, key))
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == key:
+            return int(self.id_order[pos])
+        return None
+
+    # === Building ===
+    @classmethod
+    def build(cls, ids, texts, metadatas, compression=CHUNK_STORE_COMPRESSION, block_bytes=CHUNK_STORE_BLOCK_BYTES):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported chunk store compression: {compression!r} (expected one of {COMPRESSIONS})")
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        if encoded:
+            offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.uint64)
+
+        block_of = block_starts = block_offsets = None
+        if compression == "none":
+            blob = b"".join(encoded)
+        else:
+            compressor = _zstd().ZstdCompressor(level=3)
+            block_of = np.zeros(len(encoded), dtype=np.uint32)
+            starts, parts, compressed_offsets, current, size = [0], [], [0], [], 0
+            for row, data in enumerate(encoded):
+                # Blocks close on chunk boundaries, so one chunk never needs two blocks
+                if current and size + len(data) > block_bytes:
+                    parts.append(compressor.compress(b"".join(current)))
+                    compressed_offsets.append(compressed_offsets[-1] + len(parts[-1]))
+                    starts.append(int(offsets[row]))
+                    current, size = [], 0
+                block_of[row] = len(starts) - 1
+                current.append(data)
+                size += len(data)
+            parts.append(compressor.compress(b"".join(current)))
+            compressed_offsets.append(compressed_offsets[-1] + len(parts[-1]))
+            blob = b"".join(parts)
+            block_starts = np.asarray(starts, dtype=np.uint64)
+            block_offsets = np.asarray(compressed_offsets, dtype=np.uint64)
+
+        id_bytes = np.array([cid.encode("utf-8") for cid in ids]) if ids else np.zeros(0, dtype="S1")
+        id_order = np.argsort(id_bytes, kind="stable").astype(np.uint32)
+        columns, strings = _metadata_columns(metadatas)
+        return cls(
+            blob, offsets, id_bytes, id_bytes[id_order], id_order, columns, strings, compression,
+            block_of, block_starts, block_offsets
+        )
+
+    @classmethod
+    def from_jsonl(cls, path, **kwargs):
+        # chunks.jsonl as written by earlier versions of the local index and BM25 index
+        ids, texts, metadatas = [], [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                texts.append(record["text"])
+                metadatas.append(record["metadata"])
+        return cls.build(ids, texts, metadatas, **kwargs)
+
+    # === Persistence ===
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        arrays = {"offsets": self.offsets, "ids": self.ids, "sorted_ids": self.sorted_ids, "id_order": self.id_order}
+        if self.compression != "none":
+            arrays.update(block_of=self.block_of, block_starts=self.block_starts, block_offsets=self.block_offsets)
+        keys = list(self.columns)
+        for i, key in enumerate(keys):
+            arrays[f"column_{i}"] = self.columns[key][1]
+
+        # New files are written aside and swapped in, so readers that still have the old
+        # ones mapped keep a valid view; header.json goes last and marks the store complete
+        replaced = []
+        with open(os.path.join(path, "text.bin.tmp"), "wb") as f:
+            f.write(self.blob)
+        replaced.append("text.bin")
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.tmp.npy"), array)
+        header = {
+            "version": CHUNK_STORE_VERSION,
+            "count": len(self),
+            "compression": self.compression,
+            "arrays": list(arrays),
+            "columns": [[key, self.columns[key][0]] for key in keys],
+            "strings": self.strings,
+        }
+        with open(os.path.join(path, "header.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+        os.replace(os.path.join(path, "text.bin.tmp"), os.path.join(path, "text.bin"))
+        for name in arrays:
+            os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+        os.replace(os.path.join(path, "header.json.tmp"), os.path.join(path, "header.json"))
+
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, "header.json"), "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != CHUNK_STORE_VERSION:
+            raise ValueError(f"Unsupported chunk store version in {path}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in header["arrays"]}
+        with open(os.path.join(path, "text.bin"), "rb") as f:
+            # mmap refuses empty files
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        columns = {key: (kind, arrays[f"column_{i}"]) for i, (key, kind) in enumerate(header["columns"])}
+        return cls(
+            blob, arrays["offsets"], arrays["ids"], arrays["sorted_ids"], arrays["id_order"], columns,
+            header["strings"], header["compression"],
+            arrays.get("block_of"), arrays.get("block_starts"), arrays.get("block_offsets")
+        )
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, "header.json"))
+
+    def stats(self):
+        arrays = [self.offsets, self.ids, self.sorted_ids, self.id_order] + [c for _, c in self.columns.values()]
+        arrays += [a for a in (self.block_of, self.block_starts, self.block_offsets) if a is not None]
+        return {
+            "chunks": len(self),
+            "compression": self.compression,
+            "text_bytes": int(self.offsets[-1]) if len(self.offsets) else 0,
+            "stored_text_bytes": len(self.blob),
+            "index_bytes": int(sum(a.nbytes for a in arrays)),
+        }
+
+
+def _metadata_columns(metadatas):
+    # One column per metadata key; strings (and JSON for other types) are interned once
+    metadatas = list(metadatas)
+    keys = list(dict.fromkeys(key for metadata in metadatas for key in metadata))
+    strings, string_ids = [], {}
+
+    def intern(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    columns = {}
+    for key in keys:
+        values = [metadata.get(key) for metadata in metadatas]
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+            column = np.array([INT_MISSING if v is None else v for v in values], dtype=np.int64)
+            columns[key] = ("int", column)
+        elif all(isinstance(v, str) for v in present):
+            columns[key] = ("str", np.array([-1 if v is None else intern(v) for v in values], dtype=np.int32))
+        else:
+            columns[key] = ("json", np.array([-1 if v is None else intern(json.dumps(v)) for v in values], dtype=np.int32))
+    return columns, strings
+
+
+class ChunkStoreWriter:
+    """Index-shaped sink for StreamingUpserter that keeps a chunk store beside a remote index."""
+
+    def __init__(self, path, text_key="text"):
+        self.path = path
+        self.text_key = text_key
+        self.records = {}
+        if ChunkStore.exists(path):
+            for record in ChunkStore.open(path).records():
+                self.records[record.id] = (record.page_content, record.metadata)
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        for cid, _, metadata in vectors:
+            metadata = dict(metadata)
+            self.records[cid] = (metadata.pop(self.text_key, ""), metadata)
+        return DoneFuture() if async_req else None
+
+    def delete(self, ids, namespace=None, **kwargs):
+        for cid in ids:
+            self.records.pop(cid, None)
+
+    def save(self):
+        ids = list(self.records)
+        ChunkStore.build(
+            ids, [self.records[cid][0] for cid in ids], [self.records[cid][1] for cid in ids]
+        ).save(self.path)
@@ -0,0 +1,172 @@
+import os
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+
+# === Index / Data Settings ===
+INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "carebot")
+VECTOR_DIMENSION = 384
+METRIC_TYPE = "cosine"
+
+DATA_DIR = os.getenv("CAREASSIST_DATA_DIR", "Data/")
+ARTIFACTS_DIR = os.getenv("CAREASSIST_ARTIFACTS_DIR", "artifacts/")
+
+# Local manifest of PDF content hash -> chunk IDs used by incremental ingestion
+MANIFEST_PATH = os.getenv(
+    "CAREASSIST_MANIFEST_PATH", os.path.join(ARTIFACTS_DIR, "ingest_manifest.json")
+)
+# Rewritten whenever store_index.py changes the corpus; serving processes watch it to refresh derived indexes
+INGEST_STAMP_PATH = os.getenv("CAREASSIST_INGEST_STAMP_PATH", os.path.join(ARTIFACTS_DIR, "ingest_stamp.json"))
+# Seconds between a server's checks of the stamp; on a change it reopens its indexes and rebuilds the FAQ (0 = never)
+CORPUS_REFRESH_INTERVAL = float(os.getenv("CAREASSIST_CORPUS_REFRESH_INTERVAL", "60"))
+
+# Number of worker processes used to parse PDFs (0 = os.cpu_count())
+INGEST_WORKERS = int(os.getenv("CAREASSIST_INGEST_WORKERS", "0"))
+
+# Streaming embedding/upsert engine
+INGEST_BATCH_SIZE = int(os.getenv("CAREASSIST_INGEST_BATCH_SIZE", "64"))
+INGEST_MAX_IN_FLIGHT = int(os.getenv("CAREASSIST_INGEST_MAX_IN_FLIGHT", "4"))
+
+# === Retrieval Backend ===
+# "pinecone" (managed index) or "local" (memory-mapped NumPy index built by store_index.py)
+VECTOR_BACKEND = os.getenv("CAREASSIST_VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_DIR = os.getenv("CAREASSIST_LOCAL_INDEX_DIR", os.path.join(ARTIFACTS_DIR, "local_index"))
+# Storage precision of the local index: float32, float16 or int8
+LOCAL_INDEX_DTYPE = os.getenv("CAREASSIST_LOCAL_INDEX_DTYPE", "float32").lower()
+
+# === Semantic Answer Cache ===
+ANSWER_CACHE_ENABLED = os.getenv("CAREASSIST_ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_DIR = os.getenv("CAREASSIST_ANSWER_CACHE_DIR", os.path.join(ARTIFACTS_DIR, "answer_cache"))
+# Minimum cosine similarity between query embeddings to reuse an answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("CAREASSIST_ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("CAREASSIST_ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("CAREASSIST_ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+# === Embedding Model ===
+EMBEDDING_MODEL_NAME = os.getenv("CAREASSIST_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# "torch" (default), "onnx" or "openvino"; the latter two need sentence-transformers>=3.2
+EMBEDDING_BACKEND = os.getenv("CAREASSIST_EMBEDDING_BACKEND", "torch").lower()
+# Optional ONNX file inside the model repo, e.g. onnx/model_qint8_avx2.onnx for the int8 build
+EMBEDDING_ONNX_FILE = os.getenv("CAREASSIST_EMBEDDING_ONNX_FILE", "")
+# Number of distinct query strings whose embeddings are memoized per process
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("CAREASSIST_QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+# Concurrent query embeddings are gathered into one encode call of up to this many texts (1 = off)
+EMBEDDING_BATCH_SIZE = int(os.getenv("CAREASSIST_EMBEDDING_BATCH_SIZE", "32"))
+# How long the first query of a batch waits for company
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("CAREASSIST_EMBEDDING_BATCH_WAIT_MS", "2"))
+
+# === LLM ===
+LLM_MODEL = os.getenv("CAREASSIST_LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TEMPERATURE = float(os.getenv("CAREASSIST_LLM_TEMPERATURE", "0.3"))
+
+# === Request Path ===
+# Per-stage timeouts (seconds) for the async pipeline
+RETRIEVAL_TIMEOUT = float(os.getenv("CAREASSIST_RETRIEVAL_TIMEOUT", "5"))
+WEB_SEARCH_TIMEOUT = float(os.getenv("CAREASSIST_WEB_SEARCH_TIMEOUT", "4"))
+LLM_TIMEOUT = float(os.getenv("CAREASSIST_LLM_TIMEOUT", "60"))
+# Threads shared by every async request for its blocking calls (embedding, search, web search, LLM)
+ASYNC_WORKER_THREADS = int(os.getenv("CAREASSIST_ASYNC_WORKER_THREADS", "64"))
+# "auto" starts the web search alongside retrieval for queries that look like they need it,
+# "always"/"never" force it on or off
+SPECULATIVE_WEB_SEARCH = os.getenv("CAREASSIST_SPECULATIVE_WEB_SEARCH", "auto").lower()
+
+# === Conversation Memory ===
+# "memory" (per-process LRU) or "sqlite" (shared by every worker on the host)
+SESSION_BACKEND = os.getenv("CAREASSIST_SESSION_BACKEND", "memory").lower()
+SESSION_DB_PATH = os.getenv("CAREASSIST_SESSION_DB_PATH", os.path.join(ARTIFACTS_DIR, "sessions.sqlite3"))
+SESSION_HISTORY_TURNS = int(os.getenv("CAREASSIST_SESSION_HISTORY_TURNS", "5"))
+SESSION_MAX_SESSIONS = int(os.getenv("CAREASSIST_SESSION_MAX_SESSIONS", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("CAREASSIST_SESSION_IDLE_TTL", str(2 * 3600)))
+# Stored messages are truncated to this many characters to bound per-session memory
+SESSION_MAX_MESSAGE_CHARS = int(os.getenv("CAREASSIST_SESSION_MAX_MESSAGE_CHARS", "4000"))
+
+# === Prompt Assembly ===
+# Upper bound on estimated input tokens sent to the LLM (system + history + context + question)
+PROMPT_TOKEN_BUDGET = int(os.getenv("CAREASSIST_PROMPT_TOKEN_BUDGET", "3500"))
+# Share of the non-fixed budget history may use before context is placed
+PROMPT_HISTORY_SHARE = float(os.getenv("CAREASSIST_PROMPT_HISTORY_SHARE", "0.3"))
+# Chunks whose words are mostly contained in an already selected chunk are dropped
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CAREASSIST_CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+
+# === Web Search Fallback ===
+# "google" (Custom Search JSON API), "http" (any CSE-compatible endpoint, e.g. the benchmark stub) or "none"
+WEB_SEARCH_BACKEND = os.getenv("CAREASSIST_WEB_SEARCH_BACKEND", "google").lower()
+WEB_SEARCH_URL = os.getenv("CAREASSIST_WEB_SEARCH_URL", "http://127.0.0.1:8765/customsearch/v1")
+WEB_SEARCH_RESULTS = int(os.getenv("CAREASSIST_WEB_SEARCH_RESULTS", "5"))
+# HTTP timeout of a single search call; the async pipeline also bounds it by WEB_SEARCH_TIMEOUT
+WEB_SEARCH_HTTP_TIMEOUT = float(os.getenv("CAREASSIST_WEB_SEARCH_HTTP_TIMEOUT", "3"))
+WEB_SEARCH_CACHE_TTL = float(os.getenv("CAREASSIST_WEB_SEARCH_CACHE_TTL", str(6 * 3600)))
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("CAREASSIST_WEB_SEARCH_CACHE_SIZE", "1000"))
+# Consecutive failures before the breaker opens, and how long it stays open (seconds)
+WEB_SEARCH_BREAKER_FAILURES = int(os.getenv("CAREASSIST_WEB_SEARCH_BREAKER_FAILURES", "3"))
+WEB_SEARCH_BREAKER_COOLDOWN = float(os.getenv("CAREASSIST_WEB_SEARCH_BREAKER_COOLDOWN", "30"))
+
+# === Hybrid Retrieval ===
+# BM25 keyword index built by store_index.py next to the vector index
+BM25_INDEX_DIR = os.getenv("CAREASSIST_BM25_INDEX_DIR", os.path.join(ARTIFACTS_DIR, "bm25"))
+# Fuse BM25 with dense results when the BM25 index exists (set to 0 to use dense only)
+HYBRID_SEARCH = os.getenv("CAREASSIST_HYBRID_SEARCH", "1") == "1"
+# Candidates taken from each retriever before reciprocal rank fusion, and the RRF constant
+HYBRID_FETCH_K = int(os.getenv("CAREASSIST_HYBRID_FETCH_K", "10"))
+RRF_K = int(os.getenv("CAREASSIST_RRF_K", "60"))
+# Web search runs when the best dense cosine similarity is below this
+WEB_FALLBACK_MIN_SCORE = float(os.getenv("CAREASSIST_WEB_FALLBACK_MIN_SCORE", "0.45"))
+# Dense hits below this similarity are not worth prompt tokens
+CONTEXT_MIN_SCORE = float(os.getenv("CAREASSIST_CONTEXT_MIN_SCORE", "0.25"))
+
+# === Re-ranking ===
+# "none", "mmr" (diversity re-rank on MiniLM embeddings) or "cross-encoder"
+RERANKER = os.getenv("CAREASSIST_RERANKER", "none").lower()
+RERANK_FETCH_K = int(os.getenv("CAREASSIST_RERANK_FETCH_K", "20"))
+# Re-ranking is skipped when retrieval plus the expected re-rank time would exceed this
+RERANK_BUDGET_MS = float(os.getenv("CAREASSIST_RERANK_BUDGET_MS", "150"))
+CROSS_ENCODER_MODEL = os.getenv("CAREASSIST_CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+MMR_LAMBDA = float(os.getenv("CAREASSIST_MMR_LAMBDA", "0.7"))
+
+# === Chunking ===
+# "structure" (headings/paragraphs/pages, token-sized) or "recursive" (original 1000/200 character splitter)
+CHUNKER = os.getenv("CAREASSIST_CHUNKER", "structure").lower()
+CHUNK_TOKENS = int(os.getenv("CAREASSIST_CHUNK_TOKENS", "300"))
+# Whole trailing sentences up to this size are repeated at the start of the next chunk;
+# 60 tokens (~240 chars) fits one typical sentence, anything smaller usually carries none
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CAREASSIST_CHUNK_OVERLAP_TOKENS", "60"))
+# Trailing pieces smaller than this are merged into the previous chunk of the same section
+CHUNK_MIN_TOKENS = int(os.getenv("CAREASSIST_CHUNK_MIN_TOKENS", "40"))
+
+# === Observability ===
+# Emit one structured JSON log line per request (stage timings, tokens, cache hits)
+REQUEST_LOGS = os.getenv("CAREASSIST_REQUEST_LOGS", "1") == "1"
+# Sample the request thread's stack and log the hottest frames of requests slower than this (0 = off)
+PROFILE_SLOW_MS = float(os.getenv("CAREASSIST_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("CAREASSIST_PROFILE_INTERVAL_MS", "10"))
+
+# === Batch Q&A (cli.py batch) ===
+BATCH_CONCURRENCY = int(os.getenv("CAREASSIST_BATCH_CONCURRENCY", "4"))
+# Questions embedded per encode call
+BATCH_EMBED_SIZE = int(os.getenv("CAREASSIST_BATCH_EMBED_SIZE", "64"))
+# LLM retries on rate limits / transient errors, with exponential backoff capped at BATCH_BACKOFF_MAX seconds
+BATCH_MAX_RETRIES = int(os.getenv("CAREASSIST_BATCH_MAX_RETRIES", "6"))
+BATCH_BACKOFF_BASE = float(os.getenv("CAREASSIST_BATCH_BACKOFF_BASE", "1"))
+BATCH_BACKOFF_MAX = float(os.getenv("CAREASSIST_BATCH_BACKOFF_MAX", "60"))
+
+# === Chunk Store ===
+# Local copy of chunk text/metadata for the Pinecone backend, so queries fetch IDs and scores only
+CHUNK_STORE_ENABLED = os.getenv("CAREASSIST_CHUNK_STORE", "1") == "1"
+CHUNK_STORE_DIR = os.getenv("CAREASSIST_CHUNK_STORE_DIR", os.path.join(ARTIFACTS_DIR, "chunks"))
+# "none" keeps text as one plain UTF-8 blob; "zstd" compresses it in blocks (needs `zstandard`)
+CHUNK_STORE_COMPRESSION = os.getenv("CAREASSIST_CHUNK_STORE_COMPRESSION", "none").lower()
+CHUNK_STORE_BLOCK_BYTES = int(os.getenv("CAREASSIST_CHUNK_STORE_BLOCK_BYTES", str(64 * 1024)))
+
+# === FAQ Warm Path ===
+FAQ_ENABLED = os.getenv("CAREASSIST_FAQ", "1") == "1"
+# Canonical questions, one per line
+FAQ_QUESTIONS_PATH = os.getenv("CAREASSIST_FAQ_QUESTIONS", "faq_questions.txt")
+FAQ_INDEX_DIR = os.getenv("CAREASSIST_FAQ_INDEX_DIR", os.path.join(ARTIFACTS_DIR, "faq"))
+# Also precompute full answers (one LLM call per question per refresh)
+FAQ_PRECOMPUTE_ANSWERS = os.getenv("CAREASSIST_FAQ_PRECOMPUTE_ANSWERS", "0") == "1"
+# Cosine similarity to a canonical question above which its stored retrieval results replace vector search...
+FAQ_CONTEXT_THRESHOLD = float(os.getenv("CAREASSIST_FAQ_CONTEXT_THRESHOLD", "0.90"))
+# ...and above which its stored answer is returned without calling the LLM
+FAQ_ANSWER_THRESHOLD = float(os.getenv("CAREASSIST_FAQ_ANSWER_THRESHOLD", "0.95"))
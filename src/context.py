@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+
+from src.config import CONTEXT_DUPLICATE_THRESHOLD, PROMPT_HISTORY_SHARE, PROMPT_TOKEN_BUDGET
+from src.prompt import build_chat_prompt, build_system_prompt
+
+
+logger = logging.getLogger(__name__)
+
+# Shortest shared run of characters treated as splitter overlap between two chunks
+MIN_OVERLAP_CHARS = 40
+
+_WORD = re.compile(r"\w+")
+
+
+# === Token Estimates ===
+def estimate_tokens(text):
+    # ~4 characters per token for English prose with Llama-family tokenizers; cheap and
+    # close enough for budgeting (the exact count comes back in the Groq usage metadata)
+    return (len(text) + 3) // 4
+
+
+# === Formatting ===
+def pdf_citation(metadata):
+    # Compact "title, p. N, section" label the model can cite directly
+    parts = []
+    title = metadata.get("source_title") or os.path.splitext(os.path.basename(str(metadata.get("source", ""))))[0]
+    if title:
+        parts.append(title)
+    page = metadata.get("page_number", metadata.get("page_label"))
+    if page is not None:
+        parts.append(f"p. {page}")
+    if metadata.get("section"):
+        parts.append(metadata["section"])
+    return ", ".join(parts)
+
+
+def format_pdf_piece(text, metadata=None):
+    citation = pdf_citation(metadata or {})
+    return f"Source: PDF ({citation})\n{text}" if citation else f"Source: PDF\n{text}"
+
+
+def format_web_piece(result):
+    return (
+        f"Source: Web Search\nTitle: {result.get('title','')}\nSnippet: {result.get('snippet','')}"
+        f"\nLink: {result.get('link','')}"
+    )
+
+
+def format_history(history):
+    history_str = ""
+    for msg in history:
+        role = "User" if msg.type == "human" else "Assistant"
+        history_str += f"{role}: {msg.content}\n"
+    return history_str
+
+
+# === Chunk Deduplication ===
+def _strip_overlap(kept, text):
+    # RecursiveCharacterTextSplitter neighbours share up to chunk_overlap characters:
+    # drop the part of `text` that repeats the tail of an already selected chunk.
+    probe = text[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return text
+    start = kept.find(probe)
+    while start != -1:
+        tail = kept[start:]
+        if text.startswith(tail):
+            return text[len(tail):].lstrip()
+        start = kept.find(probe, start + 1)
+    return text
+
+
+def _containment(words, other_words):
+    if not words:
+        return 1.0
+    return len(words & other_words) / len(words)
+
+
+def dedupe_chunks(scored_docs, threshold=CONTEXT_DUPLICATE_THRESHOLD):
+    """Rank (doc, score) pairs best first, dropping near-duplicates and splitter overlap.
+
+    Returns a list of (text, score, metadata) with the overlap already cut out of each text.
+    """
+    kept, kept_words = [], []
+    for doc, score in sorted(scored_docs, key=lambda pair: pair[1], reverse=True):
+        text = doc.page_content
+        for previous, _, _ in kept:
+            text = _strip_overlap(previous, text)
+        words = set(_WORD.findall(text.lower()))
+        if not text.strip() or any(_containment(words, other) >= threshold for other in kept_words):
+            continue
+        kept.append((text, score, doc.metadata))
+        kept_words.append(words)
+    return kept
+
+
+# === History Trimming ===
+def trim_history(history, max_tokens):
+    # Keep the most recent whole exchanges that fit; returns (history_str, tokens)
+    turns = [history[i:i + 2] for i in range(0, len(history), 2)]
+    selected, used = [], 0
+    for turn in reversed(turns):
+        turn_str = format_history(turn)
+        cost = estimate_tokens(turn_str)
+        if used + cost > max_tokens:
+            break
+        selected.insert(0, turn_str)
+        used += cost
+    return "".join(selected), used
+
+
+# === Assembly ===
+def assemble_messages(user_query, scored_pdf_results, web_results, history, budget=PROMPT_TOKEN_BUDGET,
+                      history_share=PROMPT_HISTORY_SHARE):
+    system_prompt = build_system_prompt()
+    fixed = estimate_tokens(system_prompt) + estimate_tokens(build_chat_prompt(user_query, "", ""))
+    remaining = max(0, budget - fixed)
+
+    # History first gets its share, context fills what is left in score order,
+    # then history may grow into any context budget that went unused.
+    history_str, history_tokens = trim_history(history, int(remaining * history_share))
+
+    pieces = [format_pdf_piece(text, metadata) for text, _, metadata in dedupe_chunks(scored_pdf_results)]
+    pieces += [format_web_piece(r) for r in web_results]
+    context_budget = remaining - history_tokens
+    selected, context_tokens = [], 0
+    for piece in pieces:
+        # +1 for the blank line separating pieces
+        cost = estimate_tokens(piece) + 1
+        if context_tokens + cost > context_budget:
+            continue
+        selected.append(piece)
+        context_tokens += cost
+
+    if history_tokens < estimate_tokens(format_history(history)):
+        history_str, history_tokens = trim_history(history, remaining - context_tokens)
+
+    context_str = "\n\n".join(selected)
+    messages = [
+        ("system", system_prompt),
+        ("user", build_chat_prompt(user_query, context_str, history_str))
+    ]
+    stats = {
+        "fixed_tokens": fixed,
+        "history_tokens": history_tokens,
+        "context_tokens": context_tokens,
+        "prompt_tokens": fixed + history_tokens + context_tokens,
+        "chunks_in": len(scored_pdf_results) + len(web_results),
+        "chunks_used": len(selected),
+    }
+    logger.info(
+        "prompt tokens=%(prompt_tokens)d (fixed=%(fixed_tokens)d history=%(history_tokens)d "
+        "context=%(context_tokens)d) chunks=%(chunks_used)d/%(chunks_in)d", stats
+    )
+    return messages, stats
+
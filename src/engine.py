@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+
+from src import pipeline
+from src.config import CORPUS_REFRESH_INTERVAL, LLM_MODEL, LLM_TEMPERATURE
+
+
+logger = logging.getLogger(__name__)
+
+# Marks "build the default component" where None is a meaningful choice (no answer cache)
+DEFAULT = object()
+
+
+def load_llm(model=LLM_MODEL, temperature=LLM_TEMPERATURE):
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(model=model, temperature=temperature, groq_api_key=os.getenv("GROQ_API_KEY"))
+
+
+class CareAssistPipeline:
+    """The RAG chatbot behind every front end: retrieval, web fallback, prompt, LLM, cache and memory.
+
+    Components are plain objects with small interfaces, so any of them can be swapped
+    (stubs in benchmarks, a local index, another LLM):
+
+    - embeddings: ``embed_query(text)``
+    - retriever: ``search(query, query_vector, k) -> (scored_docs, top_score)``
+    - web_search: ``__call__(query) -> [{"title", "snippet", "link"}]``
+    - llm: LangChain chat model (``invoke``/``stream``)
+    - answer_cache: ``lookup(vector)``/``store(vector, query, answer)`` or None
+    - faq: ``match(vector)``/``answer_for(match, history)`` (see src/faq.py) or None
+    - memory: ``load(session_id)``/``save_turn(session_id, user, ai)``/``clear(session_id)`` or None
+
+    A retriever built from the index files also gets a `corpus_loader`, which reopens them
+    once store_index.py has re-ingested (see refresh()).
+    """
+
+    def __init__(self, *, embeddings, retriever, llm, web_search, answer_cache=None, faq=None, memory=None, k=3,
+                 corpus_loader=None, corpus_version=None):
+        self.embeddings = embeddings
+        self.retriever = retriever
+        self.llm = llm
+        self.web_search = web_search
+        self.answer_cache = answer_cache
+        self.faq = faq
+        self.memory = memory
+        self.k = k
+        self.corpus_loader = corpus_loader
+        # Ingest stamp the retriever's files were opened at
+        self.corpus_version = corpus_version
+        self._refresher = None
+
+    @classmethod
+    def from_config(cls, *, embeddings=None, docsearch=None, retriever=None, llm=None, web_search=None,
+                    answer_cache=DEFAULT, faq=DEFAULT, memory=DEFAULT, k=3):
+        # Anything not passed in is built from the CAREASSIST_* settings
+        from src.cache import load_answer_cache
+        from src.faq import load_faq_index
+        from src.helper import download_gugging_face_embeddings
+        from src.ingest import read_ingest_stamp
+        from src.memory import load_session_store
+        from src.retrieval import load_retriever
+        from src.vectorstore import load_vector_store
+        from src.web_search import load_web_search
+
+        if embeddings is None:
+            embeddings = download_gugging_face_embeddings()
+        corpus_loader = corpus_version = None
+        if retriever is None and docsearch is None:
+            def corpus_loader():
+                # Dense search, fused with BM25 when store_index.py has built that index, optionally re-ranked
+                return load_retriever(load_vector_store(embeddings), embeddings)
+
+            # Read before opening the files, so an ingest finishing in between is picked up on the next refresh
+            corpus_version = read_ingest_stamp()
+            retriever = corpus_loader()
+        elif retriever is None:
+            retriever = load_retriever(docsearch, embeddings)
+        return cls(
+            embeddings=embeddings,
+            retriever=retriever,
+            llm=llm if llm is not None else load_llm(),
+            web_search=web_search if web_search is not None else load_web_search(),
+            answer_cache=load_answer_cache() if answer_cache is DEFAULT else answer_cache,
+            faq=load_faq_index() if faq is DEFAULT else faq,
+            memory=load_session_store() if memory is DEFAULT else memory,
+            k=k,
+            corpus_loader=corpus_loader,
+            corpus_version=corpus_version
+        )
+
+    def _components(self):
+        return {
+            "embeddings": self.embeddings,
+            "retriever": self.retriever,
+            "llm": self.llm,
+            "web_search": self.web_search,
+            "answer_cache": self.answer_cache,
+            "faq": self.faq,
+            "k": self.k,
+        }
+
+    def replace(self, **components):
+        # A pipeline sharing every component except the ones given
+        return CareAssistPipeline(**{**self._components(), "memory": self.memory, **components})
+
+    def history(self, session_id):
+        if self.memory is None or session_id is None:
+            return []
+        return self.memory.load(session_id)
+
+    def remember(self, session_id, user_query, ai_response):
+        if self.memory is not None and session_id is not None:
+            self.memory.save_turn(session_id, user_query, ai_response)
+
+    def clear(self, session_id):
+        if self.memory is not None:
+            self.memory.clear(session_id)
+
+    # === Answering ===
+    # With a session_id the last turns are used as context and the new turn is saved afterwards
+    def answer(self, user_query, session_id=None, query_vector=None):
+        response = pipeline.answer(
+            user_query, self.history(session_id), query_vector=query_vector, **self._components()
+        )
+        self.remember(session_id, user_query, response)
+        return response
+
+    def answer_stream(self, user_query, session_id=None):
+        parts = []
+        for token in pipeline.answer_stream(user_query, self.history(session_id), **self._components()):
+            parts.append(token)
+            yield token
+        # Only a fully streamed answer is saved
+        self.remember(session_id, user_query, "".join(parts))
+
+    async def answer_async(self, user_query, session_id=None):
+        # Vector search and web search overlap, and the LLM call is awaited. The session store runs on
+        # the shared worker pool: each request's loop thread is new, and SQLite connections are per thread
+        history = await pipeline.run_blocking(self.history, session_id)
+        response = await pipeline.answer_async(user_query, history, **self._components())
+        await pipeline.run_blocking(self.remember, session_id, user_query, response)
+        return response
+
+    # === Corpus Refresh ===
+    def reload_corpus(self):
+        """Reopens the vector store, chunk store and BM25 index if store_index.py wrote a new ingest stamp.
+
+        Cached answers were generated from the old corpus, so the answer cache is emptied as well.
+        """
+        from src.ingest import read_ingest_stamp
+
+        if self.corpus_loader is None:
+            return False
+        stamp = read_ingest_stamp()
+        if stamp == self.corpus_version:
+            return False
+        # In-flight requests keep the retriever they started with; its mmapped files stay valid
+        self.retriever = self.corpus_loader()
+        self.corpus_version = stamp
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        logger.info("Reopened the retrieval indexes for corpus %s", stamp)
+        return True
+
+    def refresh(self, block=False):
+        # The corpus first, so a FAQ rebuild retrieves from the new indexes and is stamped with their version
+        self.reload_corpus()
+        if self.faq is not None:
+            version = self.corpus_version if self.corpus_loader is not None else None
+            self.faq.refresh(self, corpus_version=version, block=block)
+
+    def start_refresh(self, interval=CORPUS_REFRESH_INTERVAL):
+        """Calls refresh() every `interval` seconds in a daemon thread; for long-running servers only."""
+        if self._refresher is not None or interval <= 0:
+            return
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, args=(interval,), name="careassist-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def _refresh_loop(self, interval):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Corpus refresh failed")
+            time.sleep(interval)
+
+    def stats(self):
+        return {
+            "answer_cache": {"enabled": False} if self.answer_cache is None
+            else {"enabled": True, **self.answer_cache.stats()},
+            "web_search": self.web_search.stats() if hasattr(self.web_search, "stats") else {},
+            "faq": self.faq.stats() if self.faq is not None else {},
+            "memory": self.memory.stats() if self.memory is not None else {},
+        }
+
+
+# === Process-wide Instance ===
+_pipeline = None
+_lock = threading.Lock()
+
+
+def get_pipeline(**components):
+    """Builds the process's pipeline on first call (with `components` overriding the defaults) and reuses it."""
+    global _pipeline
+    if _pipeline is None:
+        with _lock:
+            if _pipeline is None:
+                _pipeline = CareAssistPipeline.from_config(**components)
+    return _pipeline
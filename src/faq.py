@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import (
+    FAQ_ANSWER_THRESHOLD, FAQ_CONTEXT_THRESHOLD, FAQ_ENABLED, FAQ_INDEX_DIR, FAQ_PRECOMPUTE_ANSWERS,
+    FAQ_QUESTIONS_PATH
+)
+from src.helper import normalize
+from src.ingest import read_ingest_stamp
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, at worst two workers rebuild at once
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+FAQ_INDEX_VERSION = 1
+
+
+def load_questions(path=FAQ_QUESTIONS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f]
+    return list(dict.fromkeys(q for q in questions if q and not q.startswith("#")))
+
+
+class FAQEntry:
+    __slots__ = ("question", "scored_docs", "top_score", "answer")
+
+    def __init__(self, question, scored_docs, top_score, answer=None):
+        self.question = question
+        self.scored_docs = scored_docs
+        self.top_score = top_score
+        self.answer = answer
+
+
+class FAQIndex:
+    """Precomputed retrieval results (and optionally answers) for canonical questions.
+
+    On disk: vectors.npy (float16, normalized), entries.json and meta.json, which records
+    the ingest stamp the entries were built against.
+    """
+
+    def __init__(self, path=FAQ_INDEX_DIR, context_threshold=FAQ_CONTEXT_THRESHOLD,
+                 answer_threshold=FAQ_ANSWER_THRESHOLD):
+        self.path = path
+        self.context_threshold = context_threshold
+        self.answer_threshold = answer_threshold
+        self.corpus_version = None
+        self.built = None
+        self.hits = {"answer": 0, "context": 0, "miss": 0}
+        # Swapped as one tuple so readers never see vectors and entries from different builds
+        self._state = (np.zeros((0, 0), np.float32), [])
+        self.reload()
+
+    # === Lookup ===
+    def match(self, query_vector):
+        """Returns (entry, score) for the closest canonical question above the context threshold, else None."""
+        matrix, entries = self._state
+        if not entries:
+            return None
+        vector = normalize(query_vector)
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.context_threshold:
+            self.hits["miss"] += 1
+            return None
+        return entries[best], score
+
+    def answer_for(self, match, history):
+        # Stored answers were generated without chat history, so only history-free turns reuse them
+        entry, score = match
+        if entry.answer is not None and not history and score >= self.answer_threshold:
+            self.hits["answer"] += 1
+            return entry.answer
+        self.hits["context"] += 1
+        return None
+
+    def stats(self):
+        return {
+            "entries": len(self._state[1]),
+            "answers": sum(entry.answer is not None for entry in self._state[1]),
+            "corpus_version": self.corpus_version,
+            "built": self.built,
+            **{f"{kind}_hits": count for kind, count in self.hits.items()},
+        }
+
+    # === Persistence ===
+    def reload(self):
+        meta_path = os.path.join(self.path, "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != FAQ_INDEX_VERSION:
+                return False
+            if meta.get("built") == self.built:
+                return False
+            with open(os.path.join(self.path, "entries.json"), "r", encoding="utf-8") as f:
+                records = json.load(f)
+            vectors = np.load(os.path.join(self.path, "vectors.npy"))
+        except (OSError, ValueError):
+            return False
+        if len(records) != len(vectors):
+            return False
+        entries = [
+            FAQEntry(
+                record["question"],
+                [(Document(page_content=d["text"], metadata=d["metadata"]), d["score"]) for d in record["docs"]],
+                record["top_score"],
+                record.get("answer")
+            )
+            for record in records
+        ]
+        self._state = (vectors.astype(np.float32), entries)
+        self.corpus_version = meta.get("corpus_version")
+        self.built = meta.get("built")
+        logger.info("Loaded FAQ index: %d questions (corpus %s)", len(entries), self.corpus_version)
+        return True
+
+    @staticmethod
+    def build(path, questions, engine, corpus_version=None, with_answers=FAQ_PRECOMPUTE_ANSWERS):
+        """Embeds and retrieves for every question (and answers them if asked) and writes the index."""
+        vectors = engine.embeddings.embed_documents(questions) if questions else []
+        # Answers must come from the full pipeline, not from this (possibly stale) index or the cache
+        answering = engine.replace(faq=None, answer_cache=None, memory=None) if with_answers else None
+        records = []
+        for question, vector in zip(questions, vectors):
+            scored_docs, top_score = engine.retriever.search(question, vector, k=engine.k)
+            record = {
+                "question": question,
+                "top_score": float(top_score),
+                "docs": [
+                    {"text": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+                    for doc, score in scored_docs
+                ],
+            }
+            if answering is not None:
+                record["answer"] = answering.answer(question, query_vector=vector)
+            records.append(record)
+
+        os.makedirs(path, exist_ok=True)
+        matrix = normalize(vectors).astype(np.float16) if records else np.zeros((0, 0), np.float16)
+        np.save(os.path.join(path, "vectors.tmp.npy"), matrix)
+        with open(os.path.join(path, "entries.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(os.path.join(path, "vectors.tmp.npy"), os.path.join(path, "vectors.npy"))
+        os.replace(os.path.join(path, "entries.tmp.json"), os.path.join(path, "entries.json"))
+        # meta.json goes last: readers only pick up a build once it is complete
+        meta = {"version": FAQ_INDEX_VERSION, "corpus_version": corpus_version, "built": time.time(),
+                "questions": len(records)}
+        with open(os.path.join(path, "meta.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(path, "meta.tmp.json"), os.path.join(path, "meta.json"))
+        return meta
+
+    # === Refresh ===
+    def refresh(self, engine, questions_path=FAQ_QUESTIONS_PATH, corpus_version=None, block=False):
+        """Rebuilds the index from `engine` unless it already matches the corpus and question list.
+
+        `corpus_version` is the ingest stamp `engine.retriever` was opened at (read from disk when
+        None). Only one process builds at a time; others return False, or with `block` wait for
+        that build and load it. Engines call this from their refresh loop (see src/engine.py).
+        """
+        stamp = corpus_version if corpus_version is not None else read_ingest_stamp()
+        questions = load_questions(questions_path)
+        if not questions:
+            return False
+        built = self._state[1]
+        if stamp == self.corpus_version and [e.question for e in built] == questions:
+            return False
+        # Pick up a build another worker already finished before building one ourselves
+        if self.reload() and self.corpus_version == stamp:
+            return True
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # Another worker is building; its result is loaded on a later tick
+                    return False
+            self.reload()
+            if self.corpus_version == stamp and [e.question for e in self._state[1]] == questions:
+                return True
+            started = time.perf_counter()
+            FAQIndex.build(self.path, questions, engine, corpus_version=stamp)
+            logger.info("Rebuilt FAQ index for %d questions in %.1fs", len(questions), time.perf_counter() - started)
+        return self.reload()
+
+
+def load_faq_index():
+    if not FAQ_ENABLED:
+        return None
+    return FAQIndex()
@@ -1,12 +1,28 @@
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
 
+import numpy as np
+from langchain_core.embeddings import Embeddings
 
+from src.config import (
+    EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS, EMBEDDING_MODEL_NAME,
+    EMBEDDING_ONNX_FILE, QUERY_EMBEDDING_CACHE_SIZE
+)
+
+
+# Document loaders, splitters and the HuggingFace stack are imported inside the
+# functions that need them, so importing this module stays cheap for the web apps.
 
 
 # Extract the Data from PDF files in the directory
 def load_pdf_file(data):
+    from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+
     loader = DirectoryLoader(
         data,
         glob = "*.pdf",
@@ -18,6 +34,8 @@ def load_pdf_file(data):
 
 # Split the Documents into Chunks
 def text_split(extracted_data):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
@@ -27,7 +45,141 @@ def text_split(extracted_data):
     return text_chunks
 
 
+def normalize(vectors):
+    # Unit-length rows (or one unit vector), so cosine similarity is a dot product; zero vectors stay zero
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+# Memoize repeated query strings; documents are always embedded fresh
+class CachedQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings, max_size=4096):
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = " ".join(text.split()).lower()
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = vector
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return vector
+
+
+# Gather concurrent query embeddings into one encode call on a worker thread
+class BatchingQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings, max_batch_size=32, max_wait_ms=2.0):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.queries = 0
+        self._last_batch_size = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.submit(text).result()
+
+    def submit(self, text):
+        future = Future()
+        self._ensure_worker().put((text, future))
+        return future
+
+    def _ensure_worker(self):
+        # Started on first use, and again in each forked gunicorn worker (threads do not survive a fork)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.SimpleQueue()
+                threading.Thread(
+                    target=self._run, args=(self._queue,), name="careassist-embed-batcher", daemon=True
+                ).start()
+            return self._queue
+
+    def _collect(self, pending):
+        batch = [pending.get()]
+        # A lone query goes straight through; waiting only pays off once requests overlap
+        deadline = time.monotonic() + (self.max_wait if self._last_batch_size > 1 or not pending.empty() else 0)
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Whatever queued up during the previous encode is taken without waiting
+                batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, pending):
+        while True:
+            batch = self._collect(pending)
+            # Identical concurrent queries are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.queries += len(batch)
+            self._last_batch_size = len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def query_embeddings(embeddings, cache_size=QUERY_EMBEDDING_CACHE_SIZE, batch_size=EMBEDDING_BATCH_SIZE,
+                     batch_wait_ms=EMBEDDING_BATCH_WAIT_MS):
+    # Cache in front of the batcher, so repeated queries never queue
+    if batch_size > 1:
+        embeddings = BatchingQueryEmbeddings(embeddings, max_batch_size=batch_size, max_wait_ms=batch_wait_ms)
+    if cache_size:
+        embeddings = CachedQueryEmbeddings(embeddings, max_size=cache_size)
+    return embeddings
+
+
+@lru_cache(maxsize=None)
+def _load_embedding_model(model_name, backend, onnx_file):
+    # One model per process; loading it before a fork (see gunicorn.conf.py) lets
+    # every worker share the weights copy-on-write instead of loading its own copy.
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    model_kwargs = {}
+    if backend != "torch":
+        model_kwargs["backend"] = backend
+        if onnx_file:
+            model_kwargs["model_kwargs"] = {"file_name": onnx_file}
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+
+
 # download the Embedding from HugggingFace
-def download_gugging_face_embeddings():
-    embeddings= HuggingFaceEmbeddings(model_name = "sentence-transformers/all-MiniLM-L6-v2")
-    return embeddings
\ No newline at end of file
+def download_gugging_face_embeddings(query_cache_size=QUERY_EMBEDDING_CACHE_SIZE, batch_size=EMBEDDING_BATCH_SIZE):
+    embeddings = _load_embedding_model(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE)
+    return query_embeddings(embeddings, cache_size=query_cache_size, batch_size=batch_size)
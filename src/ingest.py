@@ -0,0 +1,324 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from src.chunking import chunker_signature, split_pages
+from src.config import INGEST_STAMP_PATH
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Pinecone accepts at most 1000 IDs per delete request
+DELETE_BATCH_SIZE = 1000
+
+
+# === Hashing / IDs ===
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, text: str) -> str:
+    # Deterministic ID: the same chunk text from the same file always maps to the
+    # same vector, so unchanged chunks of an edited PDF are never re-embedded.
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def assign_chunk_ids(source: str, chunks):
+    ids, docs, seen = [], [], set()
+    for doc in chunks:
+        cid = chunk_id(source, doc.page_content)
+        if cid in seen:
+            # Identical text repeated inside one file only needs one vector
+            continue
+        seen.add(cid)
+        doc.metadata["source"] = source
+        doc.metadata["chunk_id"] = cid
+        ids.append(cid)
+        docs.append(doc)
+    return ids, docs
+
+
+# === Manifest ===
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported ingest manifest version in {path}")
+    return manifest
+
+
+def save_manifest(manifest, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    # Atomic swap so a crash never leaves a half-written manifest behind
+    os.replace(tmp_path, path)
+
+
+def write_ingest_stamp(stats, path=INGEST_STAMP_PATH):
+    # A new version tells serving processes (see src/faq.py) that the corpus changed
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": uuid.uuid4().hex, "finished": time.time(), "stats": stats}, f)
+    os.replace(tmp_path, path)
+
+
+def read_ingest_stamp(path=INGEST_STAMP_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+# === PDF Parsing ===
+def list_pdf_files(data_dir):
+    return sorted(p.as_posix() for p in Path(data_dir).glob("*.pdf"))
+
+
+def _load_and_split(path):
+    # Runs inside a worker process; imported here so the pool workers pay for it once
+    from langchain_community.document_loaders import PyPDFLoader
+
+    pages = PyPDFLoader(path).load()
+    return path, split_pages(pages)
+
+
+def parse_pdfs(paths, workers=0):
+    # Yields (path, chunks) in order as the pool finishes each file
+    if not paths:
+        return
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers == 1:
+        yield from map(_load_and_split, paths)
+        return
+    # Backpressure: about two files per worker in flight, so parsed chunks waiting
+    # behind a slow file (or a slow consumer) never pile up for the whole corpus
+    max_in_flight = 2 * workers
+    remaining = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque(pool.submit(_load_and_split, path) for path in islice(remaining, max_in_flight))
+        while in_flight:
+            result = in_flight.popleft().result()
+            for path in islice(remaining, 1):
+                in_flight.append(pool.submit(_load_and_split, path))
+            yield result
+
+
+# === Change Detection ===
+def plan_changes(data_dir, manifest, force=False):
+    current = {path: file_sha256(path) for path in list_pdf_files(data_dir)}
+    known = manifest["files"]
+
+    changed = [
+        path for path, sha in current.items()
+        if force or known.get(path, {}).get("sha256") != sha
+    ]
+    removed = [path for path in known if path not in current]
+    return current, changed, removed
+
+
+def _batched(items, size):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# === Index Sinks ===
+class DoneFuture(Future):
+    # What local (synchronous) sinks return for async_req=True upserts
+    def __init__(self, value=None):
+        super().__init__()
+        self.set_result(value)
+
+
+class FanoutIndex:
+    """Sends every upsert/delete to the primary index and to local secondary sinks (e.g. BM25)."""
+
+    def __init__(self, primary, *secondary):
+        self.primary = primary
+        self.secondary = secondary
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        for sink in self.secondary:
+            sink.upsert(vectors=vectors, namespace=namespace)
+        return self.primary.upsert(vectors=vectors, namespace=namespace, async_req=async_req, **kwargs)
+
+    def delete(self, ids, namespace=None, **kwargs):
+        for sink in self.secondary:
+            sink.delete(ids=ids, namespace=namespace)
+        return self.primary.delete(ids=ids, namespace=namespace, **kwargs)
+
+
+# === Streaming Embedding + Upsert ===
+def iter_pdf_chunks(paths):
+    # One PDF at a time (sections carry across its pages), so memory is bounded by the largest file
+    from langchain_community.document_loaders import PyPDFLoader
+
+    for path in paths:
+        yield path, split_pages(list(PyPDFLoader(path).lazy_load()))
+
+
+class StreamingUpserter:
+    """Embeds chunks in fixed-size batches and upserts them over gRPC with bounded concurrency."""
+
+    def __init__(self, index, embeddings, batch_size=64, max_in_flight=4, namespace=None, text_key="text"):
+        self.index = index
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.namespace = namespace
+        self.text_key = text_key
+        self._in_flight = deque()
+        self.chunks = 0
+        self.batches = 0
+        self._started = None
+
+    def _wait_oldest(self):
+        self._in_flight.popleft().result()
+
+    def _send(self, batch):
+        texts = [doc.page_content for _, doc in batch]
+        vectors = self.embeddings.embed_documents(texts)
+        records = [
+            # Same metadata layout as PineconeVectorStore so the apps can read it back
+            (cid, vector, {**doc.metadata, self.text_key: doc.page_content})
+            for (cid, doc), vector in zip(batch, vectors)
+        ]
+        # Backpressure: never let more than max_in_flight requests pile up
+        while len(self._in_flight) >= self.max_in_flight:
+            self._wait_oldest()
+        self._in_flight.append(
+            self.index.upsert(vectors=records, namespace=self.namespace, async_req=True)
+        )
+        self.chunks += len(batch)
+        self.batches += 1
+        if self.batches % 20 == 0:
+            logger.info("Upserted %d chunks (%.1f chunks/sec)", self.chunks, self.rate)
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return self.chunks / elapsed if elapsed > 0 else 0.0
+
+    def run(self, items):
+        """Consume an iterable of (chunk_id, Document) and return throughput stats."""
+        self._started = time.perf_counter()
+        for batch in _batched(items, self.batch_size):
+            self._send(batch)
+        while self._in_flight:
+            self._wait_oldest()
+        elapsed = time.perf_counter() - self._started
+        return {
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(self.rate, 1),
+        }
+
+
+# === Ingestion Entry Points ===
+def _delete_ids(index, ids, namespace=None):
+    for batch in _batched(ids, DELETE_BATCH_SIZE):
+        index.delete(ids=batch, namespace=namespace)
+
+
+def incremental_ingest(upserter, data_dir, manifest_path, workers=0, force=False, commit=None):
+    manifest = load_manifest(manifest_path)
+    # Manifests written before the chunker was configurable used the recursive splitter
+    if manifest["files"] and manifest.get("chunker", "recursive:1000:200") != chunker_signature():
+        logger.info("Chunker changed since the last run; re-chunking every file")
+        force = True
+    manifest["chunker"] = chunker_signature()
+    current, changed, removed = plan_changes(data_dir, manifest, force=force)
+
+    stale_ids = []
+
+    def new_chunks():
+        # Parsed files are consumed as the pool produces them and streamed straight
+        # into the upserter, so memory is bounded by the change, not the corpus.
+        for path, chunks in parse_pdfs(changed, workers=workers):
+            ids, docs = assign_chunk_ids(path, chunks)
+            old_ids = set(manifest["files"].get(path, {}).get("chunk_ids", []))
+            for cid, doc in zip(ids, docs):
+                if force or cid not in old_ids:
+                    yield cid, doc
+            stale_ids.extend(old_ids.difference(ids))
+            manifest["files"][path] = {"sha256": current[path], "chunk_ids": ids}
+
+    upsert_stats = upserter.run(new_chunks())
+
+    for path in removed:
+        stale_ids.extend(manifest["files"].pop(path)["chunk_ids"])
+    _delete_ids(upserter.index, stale_ids, namespace=upserter.namespace)
+    if commit is not None:
+        commit()
+
+    # Only record the new state once the vector store is in sync with it
+    save_manifest(manifest, manifest_path)
+
+    return {
+        "files_total": len(current),
+        "files_changed": len(changed),
+        "files_removed": len(removed),
+        "chunks_upserted": upsert_stats["chunks"],
+        "chunks_deleted": len(stale_ids),
+        "chunks_per_sec": upsert_stats["chunks_per_sec"],
+    }
+
+
+def full_ingest(upserter, data_dir, manifest_path, commit=None):
+    manifest = {"version": MANIFEST_VERSION, "chunker": chunker_signature(), "files": {}}
+    paths = list_pdf_files(data_dir)
+
+    def all_chunks():
+        seen = {}
+        for path, chunks in iter_pdf_chunks(paths):
+            file_ids = seen.setdefault(path, set())
+            for doc in chunks:
+                cid = chunk_id(path, doc.page_content)
+                if cid in file_ids:
+                    continue
+                file_ids.add(cid)
+                doc.metadata["source"] = path
+                doc.metadata["chunk_id"] = cid
+                yield cid, doc
+        for path in paths:
+            manifest["files"][path] = {
+                "sha256": file_sha256(path),
+                "chunk_ids": sorted(seen.get(path, ())),
+            }
+
+    upsert_stats = upserter.run(all_chunks())
+
+    # Drop vectors the previous manifest knew about but the new corpus no longer produces
+    previous = load_manifest(manifest_path)["files"]
+    stale_ids = [
+        cid
+        for path, entry in previous.items()
+        for cid in set(entry["chunk_ids"]).difference(manifest["files"].get(path, {}).get("chunk_ids", ()))
+    ]
+    _delete_ids(upserter.index, stale_ids, namespace=upserter.namespace)
+    if commit is not None:
+        commit()
+
+    save_manifest(manifest, manifest_path)
+    return {"files_total": len(paths), "chunks_deleted": len(stale_ids), **upsert_stats}
@@ -0,0 +1,207 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.config import (
+    SESSION_BACKEND, SESSION_DB_PATH, SESSION_HISTORY_TURNS, SESSION_IDLE_TTL,
+    SESSION_MAX_MESSAGE_CHARS, SESSION_MAX_SESSIONS
+)
+
+
+class ChatMessage:
+    # Same .type/.content shape as LangChain messages, without the per-object overhead
+    __slots__ = ("type", "content")
+
+    def __init__(self, type, content):
+        self.type = type
+        self.content = content
+
+    def __repr__(self):
+        return f"ChatMessage(type={self.type!r}, content={self.content[:40]!r})"
+
+
+def _turn_messages(turns):
+    history = []
+    for user_text, ai_text in turns:
+        history.append(ChatMessage("human", user_text))
+        history.append(ChatMessage("ai", ai_text))
+    return history
+
+
+class SessionMemoryStore:
+    """Per-session window of the last `k` exchanges, LRU-bounded with idle eviction."""
+
+    def __init__(self, k=5, max_sessions=10000, idle_ttl=2 * 3600, max_message_chars=4000):
+        self.k = k
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_message_chars = max_message_chars
+        self.evictions = 0
+        # session_id -> (last_used, deque of (user, ai)); least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            self._evict_idle()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            self._sessions[session_id] = (time.time(), entry[1])
+            self._sessions.move_to_end(session_id)
+            return _turn_messages(entry[1])
+
+    def save_turn(self, session_id, user_text, ai_text):
+        turn = (user_text[:self.max_message_chars], ai_text[:self.max_message_chars])
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            turns = entry[1] if entry else deque(maxlen=self.k)
+            turns.append(turn)
+            self._sessions[session_id] = (time.time(), turns)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            self._evict_idle()
+            sizes = [
+                sum(len(u.encode("utf-8")) + len(a.encode("utf-8")) for u, a in turns)
+                for _, turns in self._sessions.values()
+            ]
+        return {
+            "backend": "memory",
+            "sessions": len(sizes),
+            "text_bytes": sum(sizes),
+            "max_session_bytes": max(sizes, default=0),
+            "session_bytes_limit": 2 * self.k * self.max_message_chars * 4,
+            "evictions": self.evictions,
+        }
+
+    def _evict_idle(self):
+        cutoff = time.time() - self.idle_ttl
+        # Ordered by last use, so stop at the first session still active
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if last_used >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+
+class SQLiteSessionStore:
+    """Same interface as SessionMemoryStore, persisted in SQLite so any worker can serve any session."""
+
+    def __init__(self, path, k=5, max_sessions=10000, idle_ttl=2 * 3600, max_message_chars=4000):
+        self.path = path
+        self.k = k
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_message_chars = max_message_chars
+        self.evicted_turns = 0
+        self._last_evict = 0.0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL, user_text TEXT NOT NULL, ai_text TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS turns_created ON turns (created)")
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers in other workers proceed during writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        cutoff = time.time() - self.idle_ttl
+        rows = self._connect().execute(
+            "SELECT user_text, ai_text FROM turns WHERE session_id = ? AND created >= ? ORDER BY id DESC LIMIT ?",
+            (session_id, cutoff, self.k)
+        ).fetchall()
+        return _turn_messages(reversed(rows))
+
+    def save_turn(self, session_id, user_text, ai_text):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO turns (session_id, user_text, ai_text, created) VALUES (?, ?, ?, ?)",
+                (session_id, user_text[:self.max_message_chars], ai_text[:self.max_message_chars], time.time())
+            )
+            # Keep only the window this session can ever read back
+            conn.execute(
+                "DELETE FROM turns WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.k)
+            )
+        self._evict()
+
+    def clear(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+
+    def stats(self):
+        conn = self._connect()
+        sessions, text_bytes = conn.execute(
+            "SELECT COUNT(DISTINCT session_id), COALESCE(SUM(LENGTH(CAST(user_text AS BLOB)) + LENGTH(CAST(ai_text AS BLOB))), 0) FROM turns"
+        ).fetchone()
+        max_session_bytes = conn.execute(
+            "SELECT COALESCE(MAX(size), 0) FROM (SELECT SUM(LENGTH(CAST(user_text AS BLOB)) + LENGTH(CAST(ai_text AS BLOB))) AS size"
+            " FROM turns GROUP BY session_id)"
+        ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "text_bytes": text_bytes,
+            "max_session_bytes": max_session_bytes,
+            "session_bytes_limit": 2 * self.k * self.max_message_chars * 4,
+            "evicted_turns": self.evicted_turns,
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+    def _evict(self, interval=60):
+        # Sweeping scans the whole table, so do it at most once per interval per worker
+        now = time.time()
+        if now - self._last_evict < interval:
+            return
+        self._last_evict = now
+        cutoff = now - self.idle_ttl
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM turns WHERE created < ?", (cutoff,)).rowcount
+            # Oldest sessions beyond max_sessions, by their latest turn
+            removed += conn.execute(
+                "DELETE FROM turns WHERE session_id IN ("
+                " SELECT session_id FROM turns GROUP BY session_id ORDER BY MAX(id) DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            ).rowcount
+        self.evicted_turns += removed
+
+
+def load_session_store(backend=None):
+    backend = (backend or SESSION_BACKEND).lower()
+    options = dict(
+        k=SESSION_HISTORY_TURNS,
+        max_sessions=SESSION_MAX_SESSIONS,
+        idle_ttl=SESSION_IDLE_TTL,
+        max_message_chars=SESSION_MAX_MESSAGE_CHARS
+    )
+    if backend == "memory":
+        return SessionMemoryStore(**options)
+    if backend == "sqlite":
+        return SQLiteSessionStore(SESSION_DB_PATH, **options)
+    raise ValueError(f"Unknown session backend: {backend!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,256 @@
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.config import PROFILE_INTERVAL_MS, PROFILE_SLOW_MS, REQUEST_LOGS
+
+
+logger = logging.getLogger("careassist.requests")
+if REQUEST_LOGS and not logger.handlers:
+    # One bare JSON object per line, whatever the root logging config is
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Seconds; covers a cache hit (~ms) up to a slow LLM completion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+# === Metric Types (Prometheus text format) ===
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # key -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{_label_str(self.labels + ('le',), key + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_label_str(self.labels + ('le',), key + ('+Inf',))} {row[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {row[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {row[-1]}")
+        return lines
+
+
+class Gauge:
+    # Read from a callback at scrape time (cache sizes, session counts, ...)
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self):
+        try:
+            value = float(self.read())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+# === Registry ===
+REGISTRY = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def gauge(name, help, read):
+    # Re-registering a name (e.g. Streamlit reruns) replaces the old callback
+    REGISTRY[:] = [m for m in REGISTRY if m.name != name]
+    return _register(Gauge(name, help, read))
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUESTS = _register(Counter("careassist_requests_total", "Chat requests served.", ("endpoint",)))
+ERRORS = _register(Counter("careassist_errors_total", "Failed pipeline stages.", ("stage",)))
+CACHE = _register(Counter("careassist_answer_cache_total", "Answer cache lookups.", ("result",)))
+FAQ = _register(Counter("careassist_faq_total", "FAQ warm-path lookups.", ("result",)))
+WEB_SEARCHES = _register(Counter("careassist_web_search_total", "Web search fallbacks triggered."))
+TOKENS = _register(Counter("careassist_tokens_total", "LLM tokens (prompt tokens estimated).", ("kind",)))
+STAGE_SECONDS = _register(Histogram("careassist_stage_seconds", "Time spent per pipeline stage.", ("stage",)))
+REQUEST_SECONDS = _register(Histogram("careassist_request_seconds", "End-to-end request time.", ("endpoint",)))
+
+
+# === Per-request Trace ===
+_trace = ContextVar("careassist_trace", default=None)
+_sampler = ContextVar("careassist_sampler", default=None)
+
+
+def record(**fields):
+    # Attach fields (token counts, cache result, ...) to the current request's log line
+    trace = _trace.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace["stages_ms"][stage] = round(trace["stages_ms"].get(stage, 0.0) + seconds * 1000, 2)
+
+
+@contextmanager
+def request_trace(endpoint, **fields):
+    """Times a whole request, collects its spans and emits one JSON log line at the end."""
+    trace = {"event": "request", "endpoint": endpoint, "stages_ms": {}, **fields}
+    sampler = StackSampler.start() if PROFILE_SLOW_MS > 0 else None
+    token = _trace.set(trace)
+    sampler_token = _sampler.set(sampler)
+    start = time.perf_counter()
+    REQUESTS.inc(endpoint=endpoint)
+    try:
+        yield trace
+    except Exception as e:
+        trace["error"] = type(e).__name__
+        ERRORS.inc(stage="request")
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        trace["total_ms"] = round(elapsed * 1000, 2)
+        if sampler is not None:
+            samples = sampler.stop()
+            if trace["total_ms"] >= PROFILE_SLOW_MS:
+                trace["profile"] = [{"stack": stack, "samples": n} for stack, n in samples.most_common(10)]
+        _sampler.reset(sampler_token)
+        _trace.reset(token)
+        if REQUEST_LOGS:
+            logger.info(json.dumps(trace, default=str))
+
+
+def traced(func):
+    """Wraps a function handed to a worker thread (pipeline.run_blocking) so the profiler samples that thread too."""
+    def run(*args):
+        sampler = _sampler.get()
+        if sampler is None:
+            return func(*args)
+        ident = threading.get_ident()
+        sampler.thread_ids.add(ident)
+        try:
+            return func(*args)
+        finally:
+            sampler.thread_ids.discard(ident)
+    return run
+
+
+# === Slow-request Profiler ===
+class StackSampler:
+    """Samples a request's threads every few ms from a background thread; near-zero cost when idle."""
+
+    _active = {}
+    _lock = threading.Lock()
+    _thread = None
+
+    def __init__(self, thread_id):
+        self.thread_ids = {thread_id}
+        self.samples = _Tally()
+
+    @classmethod
+    def start(cls):
+        sampler = cls(threading.get_ident())
+        with cls._lock:
+            cls._active[id(sampler)] = sampler
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, name="careassist-sampler", daemon=True)
+                cls._thread.start()
+        return sampler
+
+    def stop(self):
+        with self._lock:
+            self._active.pop(id(self), None)
+        return self.samples
+
+    @classmethod
+    def _run(cls):
+        interval = PROFILE_INTERVAL_MS / 1000
+        while True:
+            time.sleep(interval)
+            with cls._lock:
+                active = list(cls._active.values())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for sampler in active:
+                for thread_id in list(sampler.thread_ids):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stack = traceback.extract_stack(frame, limit=12)
+                    sampler.samples[" < ".join(
+                        f"{f.name}@{f.filename.rsplit('/', 1)[-1]}:{f.lineno}" for f in reversed(stack)
+                    )] += 1
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import (
+    ASYNC_WORKER_THREADS, LLM_TIMEOUT, RETRIEVAL_TIMEOUT, SPECULATIVE_WEB_SEARCH, WEB_FALLBACK_MIN_SCORE,
+    WEB_SEARCH_TIMEOUT
+)
+from src import metrics
+from src.context import assemble_messages, estimate_tokens
+
+
+logger = logging.getLogger(__name__)
+
+NO_CONTEXT_ANSWER = (
+    "I'm sorry, but I do not have enough information from the available sources to answer your question. "
+    "Please consult a qualified health professional for guidance."
+)
+
+# Words that usually mean the PDFs will not be enough (prices, recency, places, regulation)
+WEB_HINTS = (
+    "price", "cost", "how much", "naira", "usd", "latest", "current", "today", "news", "recent",
+    "outbreak", "near me", "hospital in", "clinic in", "license", "licence", "lagos", "nigeria",
+)
+
+
+# === Context / Prompt Building ===
+def needs_web_fallback(pdf_results, top_score, min_score=WEB_FALLBACK_MIN_SCORE):
+    # similarity_search always returns k hits, so judge them by how close the best one is
+    return not pdf_results or top_score < min_score
+
+
+def web_search_likely(user_query, mode=SPECULATIVE_WEB_SEARCH):
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    query = user_query.lower()
+    return any(hint in query for hint in WEB_HINTS)
+
+
+def _build_messages(user_query, pdf_results, web_results, history):
+    with metrics.span("prompt_build"):
+        messages, stats = assemble_messages(user_query, pdf_results, web_results, history)
+    metrics.TOKENS.inc(stats["prompt_tokens"], kind="prompt")
+    metrics.record(prompt_tokens=stats["prompt_tokens"], chunks_used=stats["chunks_used"])
+    return messages
+
+
+def _lookup_cache(answer_cache, query_vector):
+    with metrics.span("cache_lookup"):
+        cached = answer_cache.lookup(query_vector)
+    result = "hit" if cached is not None else "miss"
+    metrics.CACHE.inc(result=result)
+    metrics.record(cache=result)
+    return cached
+
+
+def _record_completion(text, usage=None):
+    # Groq reports real usage on the response; fall back to the chars/4 estimate
+    tokens = (usage or {}).get("output_tokens") or estimate_tokens(text)
+    metrics.TOKENS.inc(tokens, kind="completion")
+    metrics.record(completion_tokens=tokens)
+
+
+def _lookup_faq(faq, query_vector, history):
+    # Returns (reply, pdf_results, top_score) from the closest canonical question, or Nones on a miss
+    if faq is None:
+        return None, None, None
+    with metrics.span("faq_lookup"):
+        match = faq.match(query_vector)
+    if match is None:
+        result, found = "miss", (None, None, None)
+    else:
+        entry, _ = match
+        reply = faq.answer_for(match, history)
+        result = "answer" if reply is not None else "context"
+        found = (reply, entry.scored_docs, entry.top_score)
+    metrics.FAQ.inc(result=result)
+    metrics.record(faq=result)
+    return found
+
+
+def _web_search(web_search, user_query):
+    metrics.WEB_SEARCHES.inc()
+    metrics.record(web_search=True)
+    with metrics.span("web_search"):
+        return web_search(user_query)
+
+
+# === Synchronous Pipeline ===
+def _prepare(user_query, history, *, embeddings, retriever, web_search, answer_cache=None, faq=None, k=3,
+             query_vector=None):
+    # Returns (query_vector, use_cache, reply, messages); `reply` is set when no LLM call is needed
+    # Embed once: the same vector drives the answer cache and the PDF search
+    # (batch callers pass vectors they already embedded together)
+    if query_vector is None:
+        with metrics.span("embedding"):
+            query_vector = embeddings.embed_query(user_query)
+
+    # Answers depend on the conversation, so only history-free turns use the cache
+    use_cache = answer_cache is not None and not history
+    if use_cache:
+        cached = _lookup_cache(answer_cache, query_vector)
+        if cached is not None:
+            return query_vector, False, cached, None
+
+    # A confident match to a canonical FAQ question skips vector search (or the LLM too)
+    reply, pdf_results, top_score = _lookup_faq(faq, query_vector, history)
+    if reply is not None:
+        return query_vector, False, reply, None
+
+    # Retrieve from PDFs (with scores, for ranking), falling back to the web
+    if pdf_results is None:
+        with metrics.span("vector_search"):
+            pdf_results, top_score = retriever.search(user_query, query_vector, k=k)
+    web_results = _web_search(web_search, user_query) if needs_web_fallback(pdf_results, top_score) else []
+
+    if not pdf_results and not web_results:
+        return query_vector, False, NO_CONTEXT_ANSWER, None
+
+    messages = _build_messages(user_query, pdf_results, web_results, history)
+    return query_vector, use_cache, None, messages
+
+
+def answer(user_query, history, *, llm, answer_cache=None, **components):
+    query_vector, use_cache, reply, messages = _prepare(
+        user_query, history, answer_cache=answer_cache, **components
+    )
+    if reply is not None:
+        return reply
+
+    with metrics.span("llm_total"):
+        response = llm.invoke(messages)
+    _record_completion(response.content, getattr(response, "usage_metadata", None))
+
+    if use_cache:
+        answer_cache.store(query_vector, user_query, response.content)
+    return response.content
+
+
+def answer_stream(user_query, history, *, llm, answer_cache=None, **components):
+    # Yields the answer piece by piece as Groq generates it
+    query_vector, use_cache, reply, messages = _prepare(
+        user_query, history, answer_cache=answer_cache, **components
+    )
+    if reply is not None:
+        yield reply
+        return
+
+    parts = []
+    usage = None
+    start = time.perf_counter()
+    with metrics.span("llm_total"):
+        for chunk in llm.stream(messages):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.content:
+                if not parts:
+                    metrics.observe_stage("llm_first_token", time.perf_counter() - start)
+                parts.append(chunk.content)
+                yield chunk.content
+    _record_completion("".join(parts), usage)
+
+    if use_cache:
+        answer_cache.store(query_vector, user_query, "".join(parts))
+
+
+# === Async Pipeline ===
+# Flask runs every async view on a new event loop in a new thread. Blocking calls therefore go
+# to one process-wide pool instead of asyncio.to_thread (the per-loop default executor), so the
+# threads, and the connections clients keep on them, outlive the request
+_workers = None
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def _worker_pool():
+    global _workers, _workers_pid
+    # Rebuilt after a fork: the parent's threads do not exist in the child
+    if _workers_pid != os.getpid():
+        with _workers_lock:
+            if _workers_pid != os.getpid():
+                _workers = ThreadPoolExecutor(max_workers=ASYNC_WORKER_THREADS, thread_name_prefix="careassist")
+                _workers_pid = os.getpid()
+    return _workers
+
+
+def run_blocking(func, *args):
+    """Awaitable that runs func(*args) on the shared worker pool, keeping the request's contextvars (trace)."""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(_worker_pool(), context.run, metrics.traced(func), *args)
+
+
+async def _stage(stage, func, *args, timeout, default):
+    # Run a blocking stage in a worker thread; a slow or failing stage degrades to `default`
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(run_blocking(func, *args), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("%s timed out after %.1fs", stage, timeout)
+    except Exception:
+        logger.exception("%s failed", stage)
+    finally:
+        metrics.observe_stage(stage, time.perf_counter() - start)
+    metrics.ERRORS.inc(stage=stage)
+    return default
+
+
+async def answer_async(user_query, history, *, embeddings, retriever, llm, web_search, answer_cache=None, faq=None,
+                       k=3, speculative_web=None):
+    with metrics.span("embedding"):
+        query_vector = await run_blocking(embeddings.embed_query, user_query)
+
+    use_cache = answer_cache is not None and not history
+    if use_cache:
+        cached = _lookup_cache(answer_cache, query_vector)
+        if cached is not None:
+            return cached
+
+    reply, pdf_results, top_score = _lookup_faq(faq, query_vector, history)
+    if reply is not None:
+        return reply
+
+    def start_web_search():
+        metrics.WEB_SEARCHES.inc()
+        metrics.record(web_search=True)
+        return asyncio.create_task(
+            _stage("web_search", web_search, user_query, timeout=WEB_SEARCH_TIMEOUT, default=[])
+        )
+
+    # Retrieval and (when probably needed) the web search run at the same time
+    web_task = None
+    if pdf_results is None:
+        if speculative_web is None:
+            speculative_web = web_search_likely(user_query)
+        web_task = start_web_search() if speculative_web else None
+        pdf_results, top_score = await _stage(
+            "vector_search", retriever.search, user_query, query_vector, k,
+            timeout=RETRIEVAL_TIMEOUT, default=([], 0.0)
+        )
+
+    web_results = []
+    if needs_web_fallback(pdf_results, top_score):
+        web_results = await (web_task or start_web_search())
+    elif web_task is not None:
+        # Not needed after all; the thread finishes in the background and is ignored
+        web_task.cancel()
+
+    if not pdf_results and not web_results:
+        return NO_CONTEXT_ANSWER
+
+    messages = _build_messages(user_query, pdf_results, web_results, history)
+    with metrics.span("llm_total"):
+        # The blocking invoke, not ainvoke: ChatGroq's async HTTP pool is bound to the event loop
+        # that opened its connections, and each Flask request runs on a new loop that is closed afterwards
+        response = await asyncio.wait_for(run_blocking(llm.invoke, messages), LLM_TIMEOUT)
+    _record_completion(response.content, getattr(response, "usage_metadata", None))
+
+    if use_cache:
+        # On the worker pool, whose threads keep their SQLite connections across requests
+        await run_blocking(answer_cache.store, query_vector, user_query, response.content)
+    return response.content
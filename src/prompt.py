@@ -1,3 +1,8 @@
+from functools import lru_cache
+
+
+# Static text: built once per process instead of on every request
+@lru_cache(maxsize=None)
 def build_system_prompt() -> str:
     return (
         "You are CareAssist AI, developed and designed by Thomas. "
@@ -43,3 +48,15 @@ def build_user_prompt(user_query: str, context_str: str) -> str:
         "Always end your response by reminding the user to consult a qualified health professional for any specific concerns. "
         "Answer:"
     )
+
+
+def build_chat_prompt(user_query: str, context_str: str, history_str: str) -> str:
+    return (
+        f"### Chat History (Last 5 exchanges):\n{history_str}\n"
+        f"### Current User Question:\n{user_query}\n\n"
+        f"### Context (PDFs + Web Search):\n{context_str}\n\n"
+        "Answer only the current question using the context and history. "
+        "Be professional, clear, and cite sources. "
+        "End with a reminder to consult a doctor.\n"
+        "Answer:"
+    )
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.config import CROSS_ENCODER_MODEL, MMR_LAMBDA, RERANK_BUDGET_MS, RERANK_FETCH_K, RERANKER
+
+
+logger = logging.getLogger(__name__)
+
+# Factor applied to the expected re-rank time on every skip
+SKIP_DECAY = 0.8
+
+
+# Rerankers take the over-fetched (doc, score) candidates and return the best
+# `top_n` as (doc, rerank_score), best first.
+
+
+class MMRReranker:
+    """Maximal marginal relevance over MiniLM embeddings, vectorized in NumPy.
+
+    Candidate vectors come from the vector store when it can return them by chunk ID
+    (``vectors_for(ids)``); only candidates it does not hold (e.g. BM25-only hits) are encoded.
+    """
+
+    def __init__(self, embeddings, lambda_mult=0.7, vector_source=None):
+        self.embeddings = embeddings
+        self.lambda_mult = lambda_mult
+        self.vector_source = vector_source if hasattr(vector_source, "vectors_for") else None
+
+    def _doc_vectors(self, candidates):
+        docs = [doc for doc, _ in candidates]
+        vectors = [None] * len(docs)
+        if self.vector_source is not None:
+            vectors = list(self.vector_source.vectors_for([doc.id for doc in docs]))
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # One batched encode for whatever the index could not supply
+            encoded = self.embeddings.embed_documents([docs[i].page_content for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return np.asarray(vectors, dtype=np.float32)
+
+    def rerank(self, query, query_vector, candidates, top_n=3):
+        if len(candidates) <= 1:
+            return candidates[:top_n]
+        doc_vectors = self._doc_vectors(candidates)
+        doc_vectors /= np.linalg.norm(doc_vectors, axis=1, keepdims=True) + 1e-12
+        query = np.asarray(query_vector, dtype=np.float32)
+        relevance = doc_vectors @ (query / (np.linalg.norm(query) + 1e-12))
+        similarity = doc_vectors @ doc_vectors.T
+
+        selected = [int(np.argmax(relevance))]
+        # Highest similarity of every candidate to anything already selected
+        redundancy = similarity[selected[0]].copy()
+        while len(selected) < min(top_n, len(candidates)):
+            mmr = self.lambda_mult * relevance - (1 - self.lambda_mult) * redundancy
+            mmr[selected] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+        return [(candidates[i][0], float(relevance[i])) for i in selected]
+
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs jointly with a small cross-encoder, in one CPU batch."""
+
+    def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query, query_vector, candidates, top_n=3):
+        if not candidates:
+            return []
+        scores = self.model.predict([(query, doc.page_content) for doc, _ in candidates], batch_size=32)
+        order = np.argsort(-np.asarray(scores))[:top_n]
+        return [(candidates[i][0], float(scores[i])) for i in order]
+
+
+class RerankingRetriever:
+    """Over-fetches from a base retriever and re-ranks, unless that would break the latency budget."""
+
+    def __init__(self, base, reranker, fetch_k=20, budget_ms=150.0):
+        self.base = base
+        self.reranker = reranker
+        self.fetch_k = fetch_k
+        self.budget_ms = budget_ms
+        self.skipped = 0
+        self.reranked = 0
+        # Moving average of re-rank time, used to predict whether the next one fits. It decays
+        # while re-ranks are skipped, so one slow call (e.g. the cold first cross-encoder run)
+        # only pauses re-ranking until the estimate fits again and the next call re-measures it
+        self._expected_ms = 0.0
+        self._lock = threading.Lock()
+
+    def search(self, query, query_vector, k=3):
+        start = time.perf_counter()
+        candidates, top_score = self.base.search(query, query_vector, k=max(k, self.fetch_k))
+        spent_ms = (time.perf_counter() - start) * 1000
+
+        if spent_ms + self._expected_ms > self.budget_ms:
+            with self._lock:
+                self.skipped += 1
+                self._expected_ms *= SKIP_DECAY
+            # Over budget: fall back to the base ranking
+            return candidates[:k], top_score
+
+        rerank_start = time.perf_counter()
+        results = self.reranker.rerank(query, query_vector, candidates, top_n=k)
+        rerank_ms = (time.perf_counter() - rerank_start) * 1000
+        with self._lock:
+            self.reranked += 1
+            self._expected_ms = rerank_ms if self.reranked == 1 else 0.8 * self._expected_ms + 0.2 * rerank_ms
+        return results, top_score
+
+    def stats(self):
+        return {"reranked": self.reranked, "skipped": self.skipped, "expected_ms": round(self._expected_ms, 1)}
+
+
+def load_reranker(embeddings, kind=None, vector_source=None):
+    kind = (kind or RERANKER).lower()
+    if kind == "none":
+        return None
+    if kind == "mmr":
+        return MMRReranker(embeddings, lambda_mult=MMR_LAMBDA, vector_source=vector_source)
+    if kind == "cross-encoder":
+        return CrossEncoderReranker(CROSS_ENCODER_MODEL)
+    raise ValueError(f"Unknown reranker: {kind!r} (expected 'none', 'mmr' or 'cross-encoder')")
+
+
+def with_reranker(retriever, embeddings, kind=None, fetch_k=RERANK_FETCH_K, budget_ms=RERANK_BUDGET_MS,
+                  vector_source=None):
+    reranker = load_reranker(embeddings, kind, vector_source=vector_source)
+    if reranker is None:
+        return retriever
+    return RerankingRetriever(retriever, reranker, fetch_k=fetch_k, budget_ms=budget_ms)
@@ -0,0 +1,63 @@
+import logging
+
+from src.bm25 import BM25Index
+from src.config import BM25_INDEX_DIR, CONTEXT_MIN_SCORE, HYBRID_FETCH_K, HYBRID_SEARCH, RRF_K
+from src.rerank import with_reranker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Retrievers return (scored_docs, top_score): scored_docs ranked best first, and
+# top_score the best dense cosine similarity, which decides the web fallback.
+
+
+class DenseRetriever:
+    def __init__(self, docsearch, min_score=CONTEXT_MIN_SCORE):
+        self.docsearch = docsearch
+        self.min_score = min_score
+
+    def search(self, query, query_vector, k=3):
+        results = self.docsearch.similarity_search_by_vector_with_score(query_vector, k=k)
+        top_score = max((score for _, score in results), default=0.0)
+        return [(doc, score) for doc, score in results if score >= self.min_score], top_score
+
+
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    # score(d) = sum over lists of 1 / (k + rank); robust to BM25 and cosine living on different scales
+    fused, docs = {}, {}
+    for results in ranked_lists:
+        for rank, (doc, _) in enumerate(results):
+            key = doc.id or doc.page_content
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+            docs.setdefault(key, doc)
+    order = sorted(fused, key=fused.get, reverse=True)
+    return [(docs[key], fused[key]) for key in order]
+
+
+class HybridRetriever:
+    """Dense search fused with BM25 keyword search by reciprocal rank fusion."""
+
+    def __init__(self, docsearch, bm25, fetch_k=10, rrf_k=60, min_score=CONTEXT_MIN_SCORE):
+        self.dense = DenseRetriever(docsearch, min_score=min_score)
+        self.bm25 = bm25
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+
+    def search(self, query, query_vector, k=3):
+        fetch_k = max(k, self.fetch_k)
+        dense_results, top_score = self.dense.search(query, query_vector, k=fetch_k)
+        sparse_results = self.bm25.search(query, k=fetch_k)
+        fused = reciprocal_rank_fusion([dense_results, sparse_results], k=self.rrf_k)
+        return fused[:k], top_score
+
+
+def load_retriever(docsearch, embeddings=None, reranker=None):
+    if HYBRID_SEARCH and BM25Index.exists(BM25_INDEX_DIR):
+        retriever = HybridRetriever(docsearch, BM25Index.load(BM25_INDEX_DIR), fetch_k=HYBRID_FETCH_K, rrf_k=RRF_K)
+    else:
+        if HYBRID_SEARCH:
+            logger.info("No BM25 index at %s; using dense retrieval only", BM25_INDEX_DIR)
+        retriever = DenseRetriever(docsearch)
+    # Optional over-fetch + re-rank stage (CAREASSIST_RERANKER)
+    return with_reranker(retriever, embeddings, kind=reranker, vector_source=docsearch)
@@ -0,0 +1,285 @@
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from src.chunkstore import ChunkStore
+from src.config import CHUNK_STORE_DIR, CHUNK_STORE_ENABLED, INDEX_NAME, LOCAL_INDEX_DIR, VECTOR_BACKEND
+from src.helper import normalize
+from src.ingest import DoneFuture
+
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Rows scored per matmul when the stored vectors need upcasting (float16 / int8)
+SCORE_BLOCK_ROWS = 65536
+
+
+def _replace_npy(path, name, array):
+    np.save(os.path.join(path, f"{name}.tmp.npy"), array)
+    os.replace(os.path.join(path, f"{name}.tmp.npy"), os.path.join(path, f"{name}.npy"))
+
+
+def quantize(vectors, dtype):
+    # Returns (stored_vectors, per_row_scale or None)
+    vectors = normalize(vectors)
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        # Symmetric per-row scaling keeps cosine ranking almost unchanged at 1/4 the size
+        scale = np.abs(vectors).max(axis=1)
+        scale[scale == 0] = 1.0
+        stored = np.round(vectors / scale[:, None] * 127).astype(np.int8)
+        return stored, (scale / 127).astype(np.float32)
+    raise ValueError(f"Unsupported local index dtype: {dtype!r} (expected one of {SUPPORTED_DTYPES})")
+
+
+class LocalVectorStore(VectorStore):
+    """Read-only cosine index over a memory-mapped .npy matrix, searched with one matmul.
+
+    Row i of `vectors` is row i of `chunks`, a memory-mapped ChunkStore holding the text and metadata.
+    """
+
+    def __init__(self, vectors, chunks, embedding=None, scales=None):
+        self.vectors = vectors
+        self.chunks = chunks
+        self.scales = scales
+        self._embedding = embedding
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    # === Persistence ===
+    @staticmethod
+    def save(path, ids, texts, metadatas, vectors, dtype="float32"):
+        os.makedirs(path, exist_ok=True)
+        stored, scales = quantize(vectors, dtype) if len(ids) else (np.zeros((0, 0), np.float32), None)
+        # Running apps have vectors.npy memory-mapped: rewriting it in place would truncate their
+        # mapping (SIGBUS) or pair old chunk rows with new vectors, so every file is written aside
+        # and swapped in with os.replace, which leaves existing mappings on the old inode
+        _replace_npy(path, "vectors", stored)
+        if scales is not None:
+            _replace_npy(path, "scales", scales)
+        elif os.path.exists(os.path.join(path, "scales.npy")):
+            os.remove(os.path.join(path, "scales.npy"))
+        ChunkStore.build(ids, texts, metadatas).save(os.path.join(path, "chunks"))
+        if os.path.exists(os.path.join(path, "chunks.jsonl")):
+            os.remove(os.path.join(path, "chunks.jsonl"))
+        # meta.json goes last and marks the index complete
+        with open(os.path.join(path, "meta.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": len(ids), "dtype": dtype, "metric": "cosine"}, f)
+        os.replace(os.path.join(path, "meta.tmp.json"), os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path, embedding=None, mmap=True):
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r" if mmap else None)
+        scales_path = os.path.join(path, "scales.npy")
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        if ChunkStore.exists(os.path.join(path, "chunks")):
+            chunks = ChunkStore.open(os.path.join(path, "chunks"))
+        else:
+            # Index written before the chunk store existed
+            chunks = ChunkStore.from_jsonl(os.path.join(path, "chunks.jsonl"))
+        return cls(vectors, chunks, embedding=embedding, scales=scales)
+
+    # === Search ===
+    def _scores(self, query_vector):
+        query = normalize(query_vector)
+        if self.vectors.dtype == np.float32:
+            scores = self.vectors @ query
+        else:
+            scores = np.empty(len(self.chunks), dtype=np.float32)
+            for start in range(0, len(self.chunks), SCORE_BLOCK_ROWS):
+                block = self.vectors[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+                scores[start:start + len(block)] = block @ query
+        if self.scales is not None:
+            scores = scores * self.scales
+        return scores
+
+    def search_ids_by_vector(self, embedding, k=4):
+        # Returns [(row, score)] best first
+        if not len(self.chunks):
+            return []
+        scores = self._scores(embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def vectors_for(self, ids):
+        # Stored vectors by chunk ID (None where the ID is not in the index), so re-rankers skip re-encoding
+        vectors = []
+        for cid in ids:
+            row = self.chunks.row_of(cid) if cid else None
+            if row is None:
+                vectors.append(None)
+                continue
+            vector = np.asarray(self.vectors[row], dtype=np.float32)
+            vectors.append(vector * self.scales[row] if self.scales is not None else vector)
+        return vectors
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        # Only the k winning rows are decoded into Documents
+        return [(self.chunks.document(row), score) for row, score in self.search_ids_by_vector(embedding, k)]
+
+    # Name used by PineconeVectorStore, so the apps can call either backend the same way
+    similarity_search_by_vector_with_score = similarity_search_with_score_by_vector
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    # === Building ===
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("LocalVectorStore is read-only; rebuild it with `python store_index.py --backend local`.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(i) for i in range(len(texts))]
+        vectors, scales = quantize(embedding.embed_documents(texts), kwargs.get("dtype", "float32"))
+        return cls(vectors, ChunkStore.build(ids, texts, metadatas), embedding=embedding, scales=scales)
+
+
+class RemoteIdVectorStore(VectorStore):
+    """Pinecone queried for IDs and scores only; text and metadata are read from a local ChunkStore.
+
+    The chunk store is written by store_index.py next to the Pinecone upserts, so each query
+    moves k (id, score) pairs over the network instead of k chunk texts. IDs the store does not
+    hold yet are fetched with their metadata in one extra call; serving processes reopen the
+    store once the ingest finishes (CareAssistPipeline.refresh).
+    """
+
+    def __init__(self, index, chunks, embedding=None, namespace=None, text_key="text"):
+        self.index = index
+        self.chunks = chunks
+        self.namespace = namespace
+        self.text_key = text_key
+        self._embedding = embedding
+        self.missing = 0
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        response = self.index.query(
+            vector=[float(x) for x in embedding], top_k=k, namespace=self.namespace,
+            include_metadata=False, include_values=False
+        )
+        rows = [self.chunks.row_of(match.id) for match in response.matches]
+        missing = [match.id for match, row in zip(response.matches, rows) if row is None]
+        fetched = self._fetch_documents(missing) if missing else {}
+        results = []
+        for match, row in zip(response.matches, rows):
+            doc = self.chunks.document(row) if row is not None else fetched.get(match.id)
+            if doc is not None:
+                results.append((doc, float(match.score)))
+        return results
+
+    def _fetch_documents(self, ids):
+        # Chunks upserted after this process opened the chunk store (an ingest still running, or
+        # finished but not yet picked up by the engine's refresh): their text is in the Pinecone metadata
+        self.missing += len(ids)
+        found = self.index.fetch(ids=ids, namespace=self.namespace).vectors
+        documents = {}
+        for cid in ids:
+            if cid in found:
+                metadata = dict(found[cid].metadata or {})
+                documents[cid] = Document(id=cid, page_content=metadata.pop(self.text_key, ""), metadata=metadata)
+        return documents
+
+    similarity_search_by_vector_with_score = similarity_search_with_score_by_vector
+
+    def vectors_for(self, ids):
+        # One fetch round trip for the candidates' stored vectors instead of re-encoding their text
+        wanted = [cid for cid in ids if cid]
+        found = self.index.fetch(ids=wanted, namespace=self.namespace).vectors if wanted else {}
+        return [list(found[cid].values) if cid in found else None for cid in ids]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Add chunks with `python store_index.py` so the local chunk store stays in sync.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Build the index with `python store_index.py`.")
+
+
+class LocalIndexWriter:
+    """Index-shaped sink for StreamingUpserter that writes a LocalVectorStore on save()."""
+
+    def __init__(self, path, dtype="float32", text_key="text"):
+        self.path = path
+        self.dtype = dtype
+        self.text_key = text_key
+        self.records = {}
+        if os.path.exists(os.path.join(path, "meta.json")):
+            # Start from the existing index so incremental runs only embed the change
+            store = LocalVectorStore.load(path, mmap=False)
+            vectors = store.vectors.astype(np.float32)
+            if store.scales is not None:
+                vectors = vectors * store.scales[:, None]
+            for row, record in enumerate(store.chunks.records()):
+                self.records[record.id] = (vectors[row], record.page_content, record.metadata)
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        for cid, values, metadata in vectors:
+            metadata = dict(metadata)
+            text = metadata.pop(self.text_key, "")
+            self.records[cid] = (np.asarray(values, dtype=np.float32), text, metadata)
+        return DoneFuture() if async_req else None
+
+    def delete(self, ids, namespace=None, **kwargs):
+        for cid in ids:
+            self.records.pop(cid, None)
+
+    def save(self):
+        ids = list(self.records)
+        texts = [self.records[cid][1] for cid in ids]
+        metadatas = [self.records[cid][2] for cid in ids]
+        vectors = np.stack([self.records[cid][0] for cid in ids]) if ids else np.zeros((0, 0), np.float32)
+        LocalVectorStore.save(self.path, ids, texts, metadatas, vectors, dtype=self.dtype)
+
+
+# === Backend Selection ===
+def load_vector_store(embeddings, backend=None):
+    backend = (backend or VECTOR_BACKEND).lower()
+    if backend == "local":
+        return LocalVectorStore.load(LOCAL_INDEX_DIR, embedding=embeddings)
+    if backend == "pinecone" and CHUNK_STORE_ENABLED and ChunkStore.exists(CHUNK_STORE_DIR):
+        from pinecone.grpc import PineconeGRPC as Pinecone
+
+        index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(INDEX_NAME)
+        return RemoteIdVectorStore(index, ChunkStore.open(CHUNK_STORE_DIR), embedding=embeddings)
+    if backend == "pinecone":
+        # No local chunk store yet: chunk text comes back in the Pinecone metadata
+        from langchain_pinecone import PineconeVectorStore
+
+        return PineconeVectorStore.from_existing_index(index_name=INDEX_NAME, embedding=embeddings)
+    raise ValueError(f"Unknown vector backend: {backend!r} (expected 'pinecone' or 'local')")
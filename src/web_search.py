@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from src.config import (
+    WEB_SEARCH_BACKEND, WEB_SEARCH_BREAKER_COOLDOWN, WEB_SEARCH_BREAKER_FAILURES, WEB_SEARCH_CACHE_SIZE,
+    WEB_SEARCH_CACHE_TTL, WEB_SEARCH_HTTP_TIMEOUT, WEB_SEARCH_RESULTS, WEB_SEARCH_URL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _to_results(response):
+    items = response.get("items", [])
+    return [
+        {"title": item.get("title"), "snippet": item.get("snippet"), "link": item.get("link")}
+        for item in items
+    ]
+
+
+# === Backends ===
+class WebSearchClient:
+    """A search backend: search(query, num_results) -> [{"title", "snippet", "link"}]; may raise."""
+
+    def search(self, query, num_results=5):
+        raise NotImplementedError
+
+
+class GoogleCSEClient(WebSearchClient):
+    def __init__(self, api_key, cse_id, timeout=3.0):
+        self.api_key = api_key
+        self.cse_id = cse_id
+        self.timeout = timeout
+        # httplib2 connections are not thread-safe, so each call checks a built service out of
+        # this pool and returns it afterwards. The pool grows to the peak number of concurrent
+        # searches and does not depend on which thread calls (async requests get a new one each time)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _build_service(self):
+        import httplib2
+        from googleapiclient.discovery import build
+
+        self.builds += 1
+        return build(
+            "customsearch", "v1",
+            developerKey=self.api_key,
+            http=httplib2.Http(timeout=self.timeout),
+            cache_discovery=False
+        )
+
+    def search(self, query, num_results=5):
+        with self._lock:
+            service = self._idle.pop() if self._idle else None
+        if service is None:
+            service = self._build_service()
+        # A call that raised may have left its connection half-read, so only clean services go back
+        res = service.cse().list(q=query, cx=self.cse_id, num=num_results).execute()
+        with self._lock:
+            self._idle.append(service)
+        return _to_results(res)
+
+
+class HttpSearchClient(WebSearchClient):
+    """Any endpoint speaking the CSE JSON format (a local stub in tests and benchmarks)."""
+
+    def __init__(self, url, timeout=3.0, api_key="", cse_id=""):
+        import urllib3
+
+        self.url = url
+        self.api_key = api_key
+        self.cse_id = cse_id
+        self.timeout = urllib3.Timeout(total=timeout)
+        self._pool = urllib3.PoolManager(maxsize=16, retries=False)
+
+    def search(self, query, num_results=5):
+        params = urlencode({"q": query, "num": num_results, "key": self.api_key, "cx": self.cse_id})
+        res = self._pool.request("GET", f"{self.url}?{params}", timeout=self.timeout)
+        if res.status != 200:
+            raise RuntimeError(f"Web search returned HTTP {res.status}")
+        return _to_results(json.loads(res.data))
+
+
+class NullSearchClient(WebSearchClient):
+    def search(self, query, num_results=5):
+        return []
+
+
+# === Resilience ===
+class CircuitBreaker:
+    """Opens after `failures` consecutive errors; lets one trial call through after `cooldown`."""
+
+    def __init__(self, failures=3, cooldown=30.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # Half-open: the next caller is the trial; others keep failing fast
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self._consecutive = 0
+                self._opened_at = None
+            else:
+                self._consecutive += 1
+                if self._consecutive >= self.failures:
+                    self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+
+class WebSearch:
+    """Shared fallback search: per-query TTL cache, circuit breaker, never raises."""
+
+    def __init__(self, client, num_results=5, cache_ttl=6 * 3600, cache_size=1000, breaker=None):
+        self.client = client
+        self.num_results = num_results
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.breaker = breaker or CircuitBreaker()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(query.lower().split())
+
+    def __call__(self, query):
+        return self.search(query)
+
+    def search(self, query):
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        if not self.breaker.allow():
+            return []
+        try:
+            results = self.client.search(query, num_results=self.num_results)
+        except Exception:
+            self.errors += 1
+            self.breaker.record(False)
+            logger.exception("Web search failed")
+            return []
+        self.breaker.record(True)
+
+        with self._lock:
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "cached_queries": len(self._cache),
+            "breaker_open": self.breaker.is_open,
+        }
+
+
+def load_web_search(backend=None):
+    backend = (backend or WEB_SEARCH_BACKEND).lower()
+    if backend == "google":
+        client = GoogleCSEClient(
+            os.getenv("GOOGLE_CSE_API_KEY"), os.getenv("GOOGLE_CSE_ID"), timeout=WEB_SEARCH_HTTP_TIMEOUT
+        )
+    elif backend == "http":
+        client = HttpSearchClient(WEB_SEARCH_URL, timeout=WEB_SEARCH_HTTP_TIMEOUT)
+    elif backend == "none":
+        client = NullSearchClient()
+    else:
+        raise ValueError(f"Unknown web search backend: {backend!r} (expected 'google', 'http' or 'none')")
+    return WebSearch(
+        client,
+        num_results=WEB_SEARCH_RESULTS,
+        cache_ttl=WEB_SEARCH_CACHE_TTL,
+        cache_size=WEB_SEARCH_CACHE_SIZE,
+        breaker=CircuitBreaker(WEB_SEARCH_BREAKER_FAILURES, WEB_SEARCH_BREAKER_COOLDOWN)
+    )
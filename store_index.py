@@ -1,47 +1,130 @@
+import argparse
+import logging
 import os
 from dotenv import load_dotenv
-from pinecone.grpc import PineconeGRPC as Pinecone
-from pinecone import ServerlessSpec
-from langchain_pinecone import PineconeVectorStore
-from src.helper import load_pdf_file, text_split, download_gugging_face_embeddings                         
+from src.helper import download_gugging_face_embeddings
+from src.config import (
+    DATA_DIR, INDEX_NAME, INGEST_BATCH_SIZE, INGEST_MAX_IN_FLIGHT, INGEST_WORKERS,
+    LOCAL_INDEX_DIR, LOCAL_INDEX_DTYPE, MANIFEST_PATH, METRIC_TYPE, VECTOR_BACKEND, VECTOR_DIMENSION,
+    BM25_INDEX_DIR, CHUNK_STORE_DIR
+)
+from src.bm25 import BM25Index, BM25Writer
+from src.chunkstore import ChunkStore, ChunkStoreWriter
+from src.ingest import FanoutIndex, StreamingUpserter, full_ingest, incremental_ingest, write_ingest_stamp
+from src.vectorstore import SUPPORTED_DTYPES, LocalIndexWriter
 
 
 load_dotenv()
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s]: %(message)s')
 
-# Read API key from environment variable
-PINECONE_API_KEY=os.environ.get('PINECONE_API_KEY')
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-if PINECONE_API_KEY is None:
-    raise ValueError("PINECONE_API_KEY environment variable is not set.")
-
-extracted_data=load_pdf_file(data='Data/')
-text_chunks = text_split(extracted_data)
-embeddings = download_gugging_face_embeddings()
-
-# Initialize client
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-index_name = "carebot"
-vector_dimension = 384 
-metric_type = "cosine"
-
-# Check whether the index exists
-if not pc.has_index(name=index_name):
-    pc.create_index(
-        name=index_name,
-        dimension=vector_dimension,
-        metric=metric_type,
-        spec=ServerlessSpec(cloud="aws", region="us-east-1")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embed the PDFs in Data/ into the CareAssist vector index.")
+    parser.add_argument(
+        "--mode", choices=["incremental", "full"], default="incremental",
+        help="incremental: only embed new/changed PDFs and delete vectors of removed ones (default). "
+             "full: stream every chunk of every PDF and rebuild the manifest."
     )
+    parser.add_argument("--force", action="store_true", help="In incremental mode, re-embed every file regardless of the manifest.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Processes used to parse PDFs (0 = all CPUs).")
+    parser.add_argument("--data", default=DATA_DIR, help="Directory containing the source PDFs.")
+    parser.add_argument("--manifest", default=None, help="Path of the local ingestion manifest (defaults per backend).")
+    parser.add_argument("--backend", choices=["pinecone", "local"], default=VECTOR_BACKEND, help="Where to store the vectors.")
+    parser.add_argument("--no-bm25", action="store_true", help="Skip building the BM25 keyword index.")
+    parser.add_argument("--no-chunk-store", action="store_true",
+                        help="With Pinecone, skip the local chunk store (queries then return text in metadata).")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default=LOCAL_INDEX_DTYPE, help="Precision of the local index.")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding/upsert batch.")
+    parser.add_argument("--max-in-flight", type=int, default=INGEST_MAX_IN_FLIGHT, help="Concurrent upsert requests before blocking.")
+    return parser.parse_args()
 
-# To get the index object later:
-index = pc.Index(index_name)
 
+def pinecone_index():
+    from pinecone.grpc import PineconeGRPC as Pinecone
+    from pinecone import ServerlessSpec
 
+    # Read API key from environment variable
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+    if PINECONE_API_KEY is None:
+        raise ValueError("PINECONE_API_KEY environment variable is not set.")
 
-# Embed each chunk and upsert the embeddings into your Pinecone index.                        
-docsearch = PineconeVectorStore.from_documents(
-    documents = text_chunks,
-    index_name = index_name,
-    embedding = embeddings
-)
\ No newline at end of file
+    # Initialize client
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+
+    # Check whether the index exists
+    if not pc.has_index(name=INDEX_NAME):
+        pc.create_index(
+            name=INDEX_NAME,
+            dimension=VECTOR_DIMENSION,
+            metric=METRIC_TYPE,
+            spec=ServerlessSpec(cloud="aws", region="us-east-1")
+        )
+
+    return pc.Index(INDEX_NAME)
+
+
+def main():
+    args = parse_args()
+
+    sinks_to_save = []
+    if args.backend == "local":
+        index = LocalIndexWriter(LOCAL_INDEX_DIR, dtype=args.dtype)
+        manifest_path = args.manifest or os.path.join(LOCAL_INDEX_DIR, "manifest.json")
+        sinks_to_save.append(index)
+    else:
+        index = pinecone_index()
+        manifest_path = args.manifest or MANIFEST_PATH
+
+    force = args.force
+    if args.backend == "pinecone" and not args.no_chunk_store:
+        # Local text/metadata for ID-only Pinecone queries (the local backend keeps its own)
+        if args.mode == "incremental" and not ChunkStore.exists(CHUNK_STORE_DIR) and os.path.exists(manifest_path):
+            logging.info("No chunk store yet; re-ingesting every file once to build it")
+            force = True
+        chunk_store = ChunkStoreWriter(CHUNK_STORE_DIR)
+        index = FanoutIndex(index, chunk_store)
+        sinks_to_save.append(chunk_store)
+
+    if not args.no_bm25:
+        # The BM25 index sees the same chunks as the vector index
+        if args.mode == "incremental" and not BM25Index.exists(BM25_INDEX_DIR) and os.path.exists(manifest_path):
+            logging.info("No BM25 index yet; re-ingesting every file once to build it")
+            force = True
+        bm25 = BM25Writer(BM25_INDEX_DIR)
+        index = FanoutIndex(index, bm25)
+        sinks_to_save.append(bm25)
+
+    def commit():
+        for sink in sinks_to_save:
+            sink.save()
+
+    embeddings = download_gugging_face_embeddings()
+
+    upserter = StreamingUpserter(
+        index,
+        embeddings,
+        batch_size=args.batch_size,
+        max_in_flight=args.max_in_flight
+    )
+
+    if args.mode == "incremental":
+        stats = incremental_ingest(
+            upserter,
+            data_dir=args.data,
+            manifest_path=manifest_path,
+            workers=args.workers,
+            force=force,
+            commit=commit
+        )
+    else:
+        stats = full_ingest(upserter, data_dir=args.data, manifest_path=manifest_path, commit=commit)
+
+    if stats.get("chunks_upserted", stats.get("chunks", 0)) or stats.get("chunks_deleted"):
+        # Running apps rebuild their FAQ warm-path index when they see a new stamp
+        write_ingest_stamp(stats)
+
+    print(f"{args.mode.capitalize()} ingestion into {args.backend} finished:", stats)
+
+
+# Guarded so the PDF parsing process pool can re-import this module safely
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from benchmarks.stubs import StubEmbeddings, in_memory_vector_store
+from src.engine import get_pipeline
+from src.memory import SessionMemoryStore
+from src.retrieval import DenseRetriever
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b"Malaria is treated with artemisinin-based therapy."
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpxLLM:
+    """Chat model shaped like ChatGroq: one long-lived httpx client per mode, keep-alive connections."""
+
+    def __init__(self, url):
+        self.url = url
+        self.client = httpx.Client()
+        self.async_client = httpx.AsyncClient()
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content=self.client.post(self.url, content=str(messages)).text)
+
+    async def ainvoke(self, messages, **kwargs):
+        response = await self.async_client.post(self.url, content=str(messages))
+        return AIMessage(content=response.text)
+
+    def stream(self, messages, **kwargs):
+        yield self.invoke(messages)
+
+
+@pytest.fixture(scope="module")
+def client():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    embeddings = StubEmbeddings(latency=0)
+    # app.py picks up this process-wide pipeline instead of building the real one
+    get_pipeline(
+        embeddings=embeddings,
+        retriever=DenseRetriever(in_memory_vector_store(embeddings, n=50), min_score=-1.0),
+        llm=HttpxLLM(f"http://127.0.0.1:{server.server_address[1]}/chat"),
+        web_search=lambda query: [],
+        answer_cache=None,
+        faq=None,
+        memory=SessionMemoryStore()
+    )
+    import app
+
+    yield app.app.test_client()
+    server.shutdown()
+
+
+def test_get_serves_consecutive_requests_on_a_shared_http_client(client):
+    # Each async view runs on its own event loop; a pooled connection must not outlive its loop
+    for query in ("What is malaria?", "How is malaria treated?", "What causes fever?"):
+        response = client.post("/get", data={"msg": query})
+        assert response.status_code == 200
+        assert "artemisinin" in response.get_data(as_text=True)
@@ -0,0 +1,68 @@
+import os
+
+from src.bm25 import BM25Index, BM25Writer, tokenize
+
+
+IDS = ["malaria", "diabetes", "hypertension", "covid"]
+TEXTS = [
+    "Malaria is treated with artemisinin-based combination therapy. Malaria causes fever.",
+    "Diabetes is managed with diet, exercise and insulin.",
+    "Hypertension is treated with beta-blockers and lifestyle changes.",
+    "Covid-19 vaccines reduce severe disease.",
+]
+METADATAS = [{"source": f"{cid}.pdf", "page": i} for i, cid in enumerate(IDS)]
+
+
+def test_tokenize_keeps_hyphenated_terms_and_drops_stopwords():
+    assert tokenize("What are the beta-blockers for COVID-19?") == ["beta-blockers", "covid-19"]
+
+
+def test_search_ranks_by_term_matches():
+    index = BM25Index.build(IDS, TEXTS, METADATAS)
+    results = index.search("malaria fever treatment", k=3)
+    assert results[0][0].id == "malaria"
+    assert results[0][0].metadata == {"source": "malaria.pdf", "page": 0}
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    # Chunks sharing no term with the query are never returned
+    assert {doc.id for doc, _ in index.search("insulin")} == {"diabetes"}
+    assert index.search("unrelated words only") == []
+
+
+def test_save_load_roundtrip(tmp_path):
+    BM25Index.build(IDS, TEXTS, METADATAS).save(tmp_path)
+    assert BM25Index.exists(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+    expected = BM25Index.build(IDS, TEXTS, METADATAS).search("treated with beta-blockers", k=4)
+    results = loaded.search("treated with beta-blockers", k=4)
+    assert [(doc.id, doc.page_content) for doc, _ in results] == [(doc.id, doc.page_content) for doc, _ in expected]
+    assert [score for _, score in results] == [score for _, score in expected]
+    assert results[0][0].id == "hypertension"
+
+
+def test_resave_replaces_files_under_an_open_index(tmp_path):
+    BM25Index.build(IDS, TEXTS, METADATAS).save(tmp_path)
+    old = BM25Index.load(tmp_path)
+    BM25Index.build(IDS[:1], TEXTS[:1], METADATAS[:1]).save(tmp_path)
+    assert not [name for name in os.listdir(tmp_path) if ".tmp" in name]
+    assert {doc.id for doc, _ in BM25Index.load(tmp_path).search("insulin malaria")} == {"malaria"}
+    assert {doc.id for doc, _ in old.search("insulin")} == {"diabetes"}
+
+
+def test_empty_index(tmp_path):
+    BM25Index.build([], [], []).save(tmp_path)
+    assert BM25Index.load(tmp_path).search("malaria") == []
+
+
+def test_writer_incremental_upsert_and_delete(tmp_path):
+    writer = BM25Writer(str(tmp_path))
+    writer.upsert([(cid, None, {"text": text, **meta}) for cid, text, meta in zip(IDS, TEXTS, METADATAS)])
+    writer.save()
+
+    writer = BM25Writer(str(tmp_path))
+    writer.delete(["malaria"])
+    writer.upsert([("dengue", None, {"text": "Dengue fever is spread by mosquitoes.", "page": 9})])
+    writer.save()
+
+    index = BM25Index.load(tmp_path)
+    assert [doc.id for doc, _ in index.search("fever")] == ["dengue"]
+    assert index.search("artemisinin") == []
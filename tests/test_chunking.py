@@ -0,0 +1,34 @@
+from langchain_core.documents import Document
+
+from src.chunking import split_blocks, structure_split
+
+
+SENTENCES = [f"Sentence {i} describes malaria symptoms and the treatment options that are available." for i in range(15)]
+
+
+def _page(text):
+    return Document(page_content=text, metadata={"source": "malaria.pdf", "page": 0})
+
+
+def test_wrapped_sentence_is_not_a_heading():
+    text = "Malaria is spread by mosquitoes.\nChildren under five\nare the most affected.\n\nTreatment\nArtemisinin is used."
+    assert list(split_blocks(text)) == [
+        ("paragraph", "Malaria is spread by mosquitoes."),
+        ("paragraph", "Children under five are the most affected."),
+        ("heading", "Treatment"),
+        ("paragraph", "Artemisinin is used."),
+    ]
+
+
+def test_heading_opens_its_first_chunk():
+    chunks = structure_split([_page("Treatment\n" + " ".join(SENTENCES[:3]))])
+    assert len(chunks) == 1
+    assert chunks[0].page_content.startswith("Treatment " + SENTENCES[0])
+    assert chunks[0].metadata["section"] == "Treatment"
+
+
+def test_folded_remainder_does_not_repeat_the_overlap():
+    chunks = structure_split([_page(" ".join(SENTENCES))], chunk_tokens=300, min_tokens=100)
+    assert len(chunks) == 1
+    for sentence in SENTENCES:
+        assert chunks[0].page_content.count(sentence) == 1
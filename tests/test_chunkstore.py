@@ -0,0 +1,94 @@
+import pytest
+
+from src.chunkstore import ChunkStore, ChunkStoreWriter
+
+
+IDS = ["c3", "a1", "b2", "e5", "d4"]
+TEXTS = ["Malaria is spread by mosquitoes.", "", "Fièvre et paludisme — traitement.", "x" * 5000, "Hypertension."]
+METADATAS = [
+    {"source": "a.pdf", "page": 0, "section": "Causes"},
+    {"source": "a.pdf", "page": 1},
+    {"source": "b.pdf", "page": 2, "score": 0.5, "tags": ["fever", "malaria"]},
+    {"source": "b.pdf", "flag": True},
+    {"source": "c.pdf", "page": 10, "section": "Diagnosis"},
+]
+
+
+@pytest.fixture(params=["none", "zstd"])
+def compression(request):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def assert_matches_input(store):
+    assert len(store) == len(IDS)
+    for row, (cid, text, metadata) in enumerate(zip(IDS, TEXTS, METADATAS)):
+        assert store.chunk_id(row) == cid
+        assert store.text(row) == text
+        assert store.metadata(row) == metadata
+        doc = store.document(row)
+        assert (doc.id, doc.page_content, doc.metadata) == (cid, text, metadata)
+
+
+def test_build_keeps_rows_ids_text_and_metadata(compression):
+    # Small blocks, so zstd spreads the chunks over several blocks
+    assert_matches_input(ChunkStore.build(IDS, TEXTS, METADATAS, compression=compression, block_bytes=64))
+
+
+def test_save_open_roundtrip(tmp_path, compression):
+    ChunkStore.build(IDS, TEXTS, METADATAS, compression=compression, block_bytes=64).save(tmp_path)
+    assert ChunkStore.exists(tmp_path)
+    store = ChunkStore.open(tmp_path)
+    assert store.compression == compression
+    assert_matches_input(store)
+    assert [record.id for record in store.records()] == IDS
+
+
+def test_row_of_finds_every_id_and_nothing_else(tmp_path, compression):
+    ChunkStore.build(IDS, TEXTS, METADATAS, compression=compression).save(tmp_path)
+    store = ChunkStore.open(tmp_path)
+    for row, cid in enumerate(IDS):
+        assert store.row_of(cid) == row
+    for unknown in ("", "a", "a10", "zz", "c3 "):
+        assert store.row_of(unknown) is None
+
+
+def test_resave_replaces_files_under_an_open_store(tmp_path):
+    ChunkStore.build(IDS, TEXTS, METADATAS).save(tmp_path)
+    old = ChunkStore.open(tmp_path)
+    ChunkStore.build(["z9"], ["replacement"], [{"page": 1}]).save(tmp_path)
+    # The open store keeps reading the files it mapped; a new open sees the new ones
+    assert_matches_input(old)
+    new = ChunkStore.open(tmp_path)
+    assert len(new) == 1 and new.text(0) == "replacement" and new.row_of("c3") is None
+
+
+def test_empty_store(tmp_path):
+    ChunkStore.build([], [], []).save(tmp_path)
+    store = ChunkStore.open(tmp_path)
+    assert len(store) == 0
+    assert store.row_of("a1") is None
+    assert list(store.records()) == []
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        ChunkStore.build(IDS, TEXTS, METADATAS, compression="lz4")
+
+
+def test_writer_applies_upserts_and_deletes_across_runs(tmp_path):
+    writer = ChunkStoreWriter(str(tmp_path))
+    writer.upsert([("a", [0.0], {"text": "first", "page": 1}), ("b", [0.0], {"text": "second", "page": 2})])
+    writer.save()
+
+    # A later incremental run starts from what is on disk
+    writer = ChunkStoreWriter(str(tmp_path))
+    writer.delete(["a"])
+    writer.upsert([("c", [0.0], {"text": "third", "page": 3})])
+    writer.save()
+
+    store = ChunkStore.open(tmp_path)
+    assert sorted(record.id for record in store.records()) == ["b", "c"]
+    assert store.document(store.row_of("c")).page_content == "third"
+    assert store.metadata(store.row_of("b")) == {"page": 2}
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from src.vectorstore import LocalIndexWriter, LocalVectorStore
+
+
+DIM = 16
+
+
+def unit(seed):
+    vector = np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def upsert(writer, ids):
+    writer.upsert([(cid, unit(seed), {"text": f"text {cid}", "page": seed}) for seed, cid in ids])
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_search_returns_nearest_chunk(tmp_path, dtype):
+    writer = LocalIndexWriter(str(tmp_path), dtype=dtype)
+    upsert(writer, [(seed, f"c{seed}") for seed in range(20)])
+    writer.save()
+
+    store = LocalVectorStore.load(str(tmp_path))
+    (doc, score), *_ = store.similarity_search_with_score_by_vector(unit(7), k=3)
+    assert (doc.id, doc.page_content, doc.metadata) == ("c7", "text c7", {"page": 7})
+    assert score == pytest.approx(1.0, abs=0.02)
+    stored = store.vectors_for(["c7", "missing"])
+    assert np.dot(stored[0], unit(7)) == pytest.approx(1.0, abs=0.02)
+    assert stored[1] is None
+
+
+def test_writer_incremental_upsert_and_delete(tmp_path):
+    writer = LocalIndexWriter(str(tmp_path))
+    upsert(writer, [(1, "a"), (2, "b"), (3, "c")])
+    writer.save()
+
+    # A later incremental run starts from the saved index
+    writer = LocalIndexWriter(str(tmp_path))
+    writer.delete(["b"])
+    upsert(writer, [(4, "d"), (5, "a")])
+    writer.save()
+
+    store = LocalVectorStore.load(str(tmp_path))
+    assert sorted(record.id for record in store.chunks.records()) == ["a", "c", "d"]
+    assert len(store.vectors) == 3
+    # "a" now carries the vector it was re-upserted with
+    assert store.similarity_search_with_score_by_vector(unit(5), k=1)[0][0].id == "a"
+    assert store.similarity_search_with_score_by_vector(unit(2), k=3)[0][0].id != "b"
+
+
+def test_resave_leaves_an_open_index_readable(tmp_path):
+    writer = LocalIndexWriter(str(tmp_path))
+    upsert(writer, [(seed, f"c{seed}") for seed in range(50)])
+    writer.save()
+    old = LocalVectorStore.load(str(tmp_path))
+
+    # A shrinking re-ingest must not truncate the files the open index has mapped
+    writer = LocalIndexWriter(str(tmp_path))
+    writer.delete([f"c{seed}" for seed in range(1, 50)])
+    writer.save()
+
+    assert old.similarity_search_with_score_by_vector(unit(30), k=1)[0][0].id == "c30"
+    assert len(LocalVectorStore.load(str(tmp_path)).chunks) == 1
+
+
+def test_empty_index(tmp_path):
+    LocalIndexWriter(str(tmp_path)).save()
+    assert LocalVectorStore.load(str(tmp_path)).similarity_search_with_score_by_vector(unit(0), k=3) == []